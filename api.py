@@ -0,0 +1,109 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import math
+from functools import lru_cache
+
+from registrations import getRegistrations
+
+# the data behind the maps, served read-only at /api/registrations and
+# /api/change; see serve_api in app.py
+
+# endpoint -> metric -> (array of Registrations, column name)
+METRICS = {
+    "registrations": {"abs": ("value", "registrations")},
+    "change": {"pct": ("pct", "pct_change"), "abs": ("absChange", "abs_change")},
+}
+DEFAULT_METRICS = {"registrations": "abs", "change": "pct"}
+LEVELS = ["state", "district"]
+FORMATS = {"json": "application/json", "csv": "text/csv"}
+
+# the data only changes with a deployment, but the URLs do not, so responses
+# are only cached for a while (and revalidated with their ETag after that)
+API_CACHE_CONTROL = "public, max-age=3600"
+
+
+class QueryError(ValueError):
+    """
+    a query asking for something that is not in the data
+    """
+
+
+def parseQuery(endpoint, args):
+    """
+    check the filters of a query (a mapping of query string arguments) and
+    get them as the arguments of apiResponse
+    """
+    level = args.get("level", "state")
+    if level not in LEVELS:
+        raise QueryError(f"level must be one of {', '.join(LEVELS)}")
+    metric = args.get("metric", DEFAULT_METRICS[endpoint])
+    if metric not in METRICS[endpoint]:
+        raise QueryError(f"metric must be one of {', '.join(METRICS[endpoint])}")
+    fmt = args.get("format", "json")
+    if fmt not in FORMATS:
+        raise QueryError(f"format must be one of {', '.join(FORMATS)}")
+
+    registrations = getRegistrations(level)
+    year = args.get("year")
+    if year is not None:
+        if not (year.isascii() and year.isdecimal()) or (
+            int(year) not in registrations.years
+        ):
+            raise QueryError(
+                f"year must be between {registrations.years[0]} and "
+                f"{registrations.years[-1]}"
+            )
+        year = int(year)
+    ages = args.get("ages")
+    if ages is not None and ages not in registrations.ages:
+        raise QueryError(f"ages must be one of {', '.join(registrations.ages)}")
+    return endpoint, level, metric, year, ages, fmt
+
+
+def queryRows(endpoint, level, metric, year=None, ages=None):
+    """
+    rows of (year, region, age group, value) for the regions reported in a
+    year (every year if None) and an age group (every one if None), with
+    missing values (and infinite growth, from no registrations) as None
+    """
+    registrations = getRegistrations(level)
+    cube = getattr(registrations, METRICS[endpoint][metric][0])
+    years = registrations.years if year is None else [year]
+    ageGroups = list(registrations.ages) if ages is None else [ages]
+    # counts are whole numbers, though stored as floats to hold NaN
+    number = int if metric == "abs" else float
+    rows = []
+    for y in years:
+        i = y - registrations.minYear
+        regions = registrations.locations[i]
+        for a in ageGroups:
+            values = cube[i, registrations.rows[i], registrations.ages[a]]
+            rows += [
+                (int(y), region, a, number(value) if math.isfinite(value) else None)
+                for region, value in zip(regions, values.tolist())
+            ]
+    return rows
+
+
+@lru_cache(maxsize=256)
+def apiResponse(endpoint, level, metric, year=None, ages=None, fmt="json"):
+    """
+    get a query's response gzip'ed, with its ETag and mimetype; responses are
+    kept, so a repeated query is only a lookup
+    """
+    columns = ["year", level, "ages", METRICS[endpoint][metric][1]]
+    rows = queryRows(endpoint, level, metric, year, ages)
+    if fmt == "csv":
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+        body = text.getvalue().encode("utf-8")
+    else:
+        records = [dict(zip(columns, row)) for row in rows]
+        body = json.dumps(records, separators=(",", ":")).encode("utf-8")
+    etag = hashlib.sha256(body).hexdigest()[:16]
+    return gzip.compress(body, mtime=0), etag, FORMATS[fmt]
@@ -5,45 +5,45 @@ import dash
 from dash import dcc
 from dash import html
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output, State
-import plotly.graph_objects as go
-import plotly.express as px
+from dash.dependencies import ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
+from flask import abort, g, request
+from flask_compress import Compress
 import plotly.colors as colors
-import pandas as pd
 import numpy as np
+import gzip
 import json
-import time
-
-from components import INDEX_STRING, getChoropleth, getAbsoluteChoropleth, createTab
-
-##### Percent Change data
-# District Data
-dfDistrictsValue = pd.read_pickle(
-    "./data/percent_change/districts/girls-women-by-district.pkl"
+import logging
+import os
+from functools import lru_cache
+
+from components import (
+    GEOMETRY_FROM,
+    INDEX_STRING,
+    VIEWS,
+    getChoropleth,
+    getAbsoluteChoropleth,
+    createTab,
+    getAnimation,
+    getDrilldown,
 )
-dfAbsChangeDistricts = pd.read_pickle(
-    "./data/percent_change/districts/abs_change_districts.pkl"
-)
-dfDistricts = pd.read_pickle("./data/percent_change/districts/pct_change_districts.pkl")
-
-# 1991 - 2022 State Data
-dfValue = pd.read_pickle("./data/girls-women-by-district-by-state.pkl")
-
-# 2006 -2022 Data
-df06 = pd.read_pickle("./data/percent_change/06-22/pct_change_06-22.pkl")
-dfAbsChange06 = pd.read_pickle("./data/percent_change/06-22/abs_change_06-22.pkl")
-
-# 1991 - 2004 Data
-df91 = pd.read_pickle("./data/percent_change/91-04/pct_change_91-04.pkl")
-dfAbsChange91 = pd.read_pickle("./data/percent_change/91-04/abs_change_91-04.pkl")
-
-# map of states (including East and West PA + Washington DC)
-with open("./data/states.geojson") as response:
-    states = json.load(response)
-
-# map of USA Hockey districts from 2007 to 2022
-with open("./data/districts07-22.geojson") as response:
-    districts = json.load(response)
+from figure_cache import RENDERERS, getFigure, prerendered, readFigure
+from profiling import profiledIfSlow
+from metrics import instrumentCallbacks, metricsResponse
+from geometry import CACHE_CONTROL, compressedGeometry, geometryFile, getGeometry
+from registrations import getRegistrations
+from api import API_CACHE_CONTROL, QueryError, apiResponse, parseQuery
+
+# draw the choropleths in the browser from data shipped with each tab, instead
+# of round-tripping every slider/dropdown change through the server
+CLIENTSIDE = os.environ.get("CLIENTSIDE", "").lower() in ["1", "true", "yes"]
+
+# log the size of every response, before and after compression
+LOG_RESPONSE_SIZES = os.environ.get("LOG_RESPONSE_SIZES", "").lower() in [
+    "1",
+    "true",
+    "yes",
+]
 
 app = dash.Dash(
     __name__,
@@ -53,6 +53,50 @@ app = dash.Dash(
 
 server = app.server
 
+# compress responses (callback JSON, Dash's scripts and the assets) with
+# brotli or gzip, whichever the browser prefers; responses smaller than
+# COMPRESS_MIN_SIZE bytes are not worth it
+server.config.update(
+    COMPRESS_ALGORITHM=["br", "gzip"],
+    COMPRESS_MIN_SIZE=int(os.environ.get("COMPRESS_MIN_SIZE", 500)),
+    COMPRESS_LEVEL=int(os.environ.get("COMPRESS_LEVEL", 6)),
+    COMPRESS_BR_LEVEL=int(os.environ.get("COMPRESS_BR_LEVEL", 5)),
+)
+
+if LOG_RESPONSE_SIZES:
+    server.logger.setLevel(logging.INFO)
+
+    # after_request functions run in the reverse order they are added, so
+    # this one sees responses after they are compressed...
+    @server.after_request
+    def log_response_size(response):
+        # callbacks are told apart by their output, e.g. choropleth-06.figure
+        body = request.get_json(silent=True) if request.is_json else None
+        target = body.get("output") if isinstance(body, dict) else None
+        server.logger.info(
+            "%s %s %s: %s bytes sent (%s), %s bytes uncompressed",
+            response.status_code,
+            request.path,
+            target or "-",
+            response.content_length,
+            response.headers.get("Content-Encoding", "identity"),
+            # unknown for responses that were compressed ahead of time
+            g.get("uncompressedSize", "-"),
+        )
+        return response
+
+
+Compress(server)
+
+if LOG_RESPONSE_SIZES:
+    # ...and this one sees them before
+    @server.after_request
+    def record_uncompressed_size(response):
+        if "Content-Encoding" not in response.headers:
+            g.uncompressedSize = response.content_length
+        return response
+
+
 app.title = "Girls/Women USA Hockey Registration"
 app.index_string = INDEX_STRING  # format HTML
 
@@ -156,13 +200,24 @@ def update_tabs(value):
 
 
 # Tab
+def createViewTab(tab):
+    """
+    create a tab, shipping its view's data along with it when rendering
+    client-side
+    """
+    if not CLIENTSIDE:
+        return createTab(tab)
+    view = next(view for view, spec in VIEWS.items() if spec["tab"] == tab)
+    return [createTab(tab), dcc.Store(id=f"data-{view}", data=viewData(view))]
+
+
 @app.callback(
     Output("tabs-year-content", "children", allow_duplicate=True),
     Input("subtab-percent-change", "value"),
     prevent_initial_call="initial_duplicate",
 )
 def render_tab(tab):
-    return createTab(tab)
+    return createViewTab(tab)
 
 
 @app.callback(
@@ -170,263 +225,415 @@ def render_tab(tab):
     Input("subtab-registration-numbers", "value"),
 )
 def render_tab(tab):
-    return createTab(tab)
+    return createViewTab(tab)
 
 
 # Choropleth
 
 
-def abbrevToState(a):
+def choroplethData(view, year, ages="Total"):
     """
-    convert state abbreviation to the full name
+    get the regions, mapped values and hover info of a view for a year and
+    age group; there is nothing to draw for one not in the data
     """
-
-    states = {
-        "AL": "Alabama",
-        "AK": "Alaska",
-        "AZ": "Arizona",
-        "AR": "Arkansas",
-        "CA": "California",
-        "CO": "Colorado",
-        "CT": "Connecticut",
-        "DC": "Washington, D.C.",
-        "DE": "Delaware",
-        "FL": "Florida",
-        "GA": "Georgia",
-        "HI": "Hawaii",
-        "ID": "Idaho",
-        "IL": "Illinois",
-        "IN": "Indiana",
-        "IA": "Iowa",
-        "KS": "Kansas",
-        "KY": "Kentucky",
-        "LA": "Louisiana",
-        "ME": "Maine",
-        "MD": "Maryland",
-        "MA": "Massachusetts",
-        "MI": "Michigan",
-        "MN": "Minnesota",
-        "MS": "Mississippi",
-        "MO": "Missouri",
-        "MT": "Montana",
-        "NE": "Nebraska",
-        "NV": "Nevada",
-        "NH": "New Hampshire",
-        "NJ": "New Jersey",
-        "NM": "New Mexico",
-        "NY": "New York",
-        "NC": "North Carolina",
-        "ND": "North Dakota",
-        "OH": "Ohio",
-        "OK": "Oklahoma",
-        "OR": "Oregon",
-        "PA": "Pennsylvania",
-        "E PA": "East Pennsylvania",
-        "W PA": "West Pennsylvania",
-        "RI": "Rhode Island",
-        "SC": "South Carolina",
-        "SD": "South Dakota",
-        "TN": "Tennessee",
-        "TX": "Texas",
-        "UT": "Utah",
-        "VT": "Vermont",
-        "VA": "Virginia",
-        "WA": "Washington",
-        "WV": "West Virginia",
-        "WI": "Wisconsin",
-        "WY": "Wyoming",
+    registrations = getRegistrations(VIEWS[view]["level"])
+    try:
+        y, a = registrations.index(year, ages)
+    except KeyError:
+        raise PreventUpdate
+    data = {
+        "locations": registrations.locations[y],
+        "labels": registrations.labels[y],
+        "values": registrations.values[y][:, a],
     }
-    return f"{states[a]} ({a})"
+    if VIEWS[view]["change"]:
+        data["z"] = registrations.mappedChanges[y][:, a]
+        data["changes"] = registrations.changes[y][:, a]
+        data["overall_change"] = registrations.overallChange[y, a]
+    else:
+        data["z"] = registrations.mappedValues[y][:, a]
+        data["total"] = registrations.totals[y, a]
+    return data
 
 
-@app.callback(
-    Output("choropleth-06", "figure"),
-    [Input("year-06", "value"), Input("ages-06", "value")],
-)
+def choroplethCallback(view):
+    """
+    register a view's figure function as the callback for its choropleth
+    (profiling slow calls when PROFILE_SLOW_MS is set), or render the
+    choropleth client-side instead when CLIENTSIDE is set
+    """
+    inputs = [Input(f"year-{view}", "value")]
+    if VIEWS[view]["ages"]:
+        inputs.append(Input(f"ages-{view}", "value"))
+
+    def decorator(f):
+        if not CLIENTSIDE:
+            return app.callback(Output(f"choropleth-{view}", "figure"), inputs)(
+                profiledIfSlow(view)(f)
+            )
+        app.clientside_callback(
+            ClientsideFunction(
+                namespace="choropleth",
+                function_name="render" if VIEWS[view]["ages"] else "renderYear",
+            ),
+            Output(f"choropleth-{view}", "figure"),
+            inputs + [Input(f"data-{view}", "data")],
+        )
+        return f
+
+    return decorator
+
+
+@choroplethCallback("06")
+@prerendered("06")
 def display_choropleth_06(year, ages):
-    df = df06[df06.Year == str(year)].fillna(0).replace(np.inf, 99999.99)
+    data = choroplethData("06", year, ages)
     # customdata is for additional info in the hover
-    customdata = np.dstack(
-        (
-            list(df["State"].apply(abbrevToState)),
-            dfValue[dfValue.Year == str(year)][ages],
-            dfAbsChange06[dfAbsChange06.Year == str(year)][ages],
-        )
-    )[0]
-    total = np.sum(dfValue[dfValue.Year == str(year)][ages])
-    lastYearTotal = np.sum(dfValue[dfValue.Year == str(year - 1)][ages])
-    overall_change = (total - lastYearTotal) / lastYearTotal * 100
+    customdata = np.dstack((data["labels"], data["values"], data["changes"]))[0]
     return getChoropleth(
         **{
-            "locations": df["State"],
-            "z": df[ages],
+            "locations": data["locations"],
+            "z": data["z"],
             "customdata": customdata,
-            "geojson": states,
+            "geojson": getGeometry("06"),
             "year": year,
             "ages": ages,
-            "overall_change": overall_change,
+            "overall_change": data["overall_change"],
             "zmax": 100,
             "zmin": -100,
         }
     )
 
 
-@app.callback(
-    Output("choropleth-91", "figure"),
-    [Input("year-91", "value")],
-)
+@choroplethCallback("91")
+@prerendered("91")
 def display_choropleth_91(year):
-    df = df91[df91.Year == str(year)].fillna(0).replace(np.inf, 99999.99)
+    data = choroplethData("91", year)
     # customdata is for additional info in the hover
-    customdata = np.dstack(
-        (
-            list(df["State"].apply(abbrevToState)),
-            dfValue[dfValue.Year == str(year)].Total,
-            dfAbsChange91[dfAbsChange91.Year == str(year)].Total,
-        )
-    )[0]
-    total = np.sum(dfValue[dfValue.Year == str(year)].Total)
-    lastYearTotal = np.sum(dfValue[dfValue.Year == str(year - 1)].Total)
-    overall_change = (total - lastYearTotal) / lastYearTotal * 100
+    customdata = np.dstack((data["labels"], data["values"], data["changes"]))[0]
     return getChoropleth(
         **{
-            "locations": df["State"],
-            "z": df.Total,
+            "locations": data["locations"],
+            "z": data["z"],
             "customdata": customdata,
-            "geojson": False,  # before 07, just uses normal states layout
+            "geojson": getGeometry("91"),  # before 07, just uses normal states layout
             "year": year,
             "ages": "",
-            "overall_change": overall_change,
+            "overall_change": data["overall_change"],
             "zmax": 100,
             "zmin": -100,
         }
     )
 
 
-@app.callback(
-    Output("choropleth-district", "figure"),
-    [Input("year-district", "value"), Input("ages-district", "value")],
-)
+@choroplethCallback("district")
+@prerendered("district")
 def display_choropleth_district(year, ages):
-    df = dfDistricts[dfDistricts.Year == str(year)].fillna(0).replace(np.inf, 99999.99)
+    data = choroplethData("district", year, ages)
     # customdata is for additional info in the hover
-    customdata = np.dstack(
-        (
-            list(df["District"]),
-            dfDistrictsValue[dfDistrictsValue.Year == str(year)][ages],
-            dfAbsChangeDistricts[dfAbsChangeDistricts.Year == str(year)][ages],
-        )
-    )[0]
-    total = np.sum(dfDistrictsValue[dfDistrictsValue.Year == str(year)][ages])
-    lastYearTotal = np.sum(
-        dfDistrictsValue[dfDistrictsValue.Year == str(year - 1)][ages]
-    )
-    overall_change = (total - lastYearTotal) / lastYearTotal * 100
+    customdata = np.dstack((data["labels"], data["values"], data["changes"]))[0]
     return getChoropleth(
         **{
-            "locations": df["District"],
-            "z": df[ages],
+            "locations": data["locations"],
+            "z": data["z"],
             "customdata": customdata,
-            "geojson": districts,
+            "geojson": getGeometry("district"),
             "year": year,
             "ages": ages,
-            "overall_change": overall_change,
+            "overall_change": data["overall_change"],
             "zmax": 25,
             "zmin": -25,
         }
     )
 
 
-@app.callback(
-    Output("choropleth-overall", "figure"),
-    [Input("year-overall", "value")],
-)
+@choroplethCallback("overall")
+@prerendered("overall")
 def display_choropleth_overall(year):
-    df = dfValue[dfValue.Year == str(year)].fillna(0).replace(np.inf, 99999.99)
+    data = choroplethData("overall", year)
     # customdata is for additional info in the hover
-    customdata = np.dstack(
-        (
-            list(df["State"].apply(abbrevToState)),
-            dfValue[dfValue.Year == str(year)].Total,
-        )
-    )[0]
-    total = np.sum(dfValue[dfValue.Year == str(year)].Total)
+    customdata = np.dstack((data["labels"], data["values"]))[0]
     return getAbsoluteChoropleth(
         **{
-            "locations": df["State"],
-            "z": df.Total,
+            "locations": data["locations"],
+            "z": data["z"],
             "customdata": customdata,
-            "geojson": states,  # switches over in year == 2005
+            "geojson": getGeometry("overall"),  # switches over in year == 2005
             "year": year,
             "ages": "",
-            "total": total,
+            "total": data["total"],
             "zmax": 4000,
             "zmin": 0,
         }
     )
 
 
-@app.callback(
-    Output("choropleth-age-group", "figure"),
-    [Input("year-age-group", "value"), Input("ages-age-group", "value")],
-)
+@choroplethCallback("age-group")
+@prerendered("age-group")
 def display_choropleth_age_group(year, ages):
-    df = dfValue[dfValue.Year == str(year)].fillna(0).replace(np.inf, 99999.99)
+    data = choroplethData("age-group", year, ages)
     # customdata is for additional info in the hover
-    customdata = np.dstack(
-        (
-            list(df["State"].apply(abbrevToState)),
-            dfValue[dfValue.Year == str(year)][ages],
-        )
-    )[0]
-    total = np.sum(dfValue[dfValue.Year == str(year)][ages])
+    customdata = np.dstack((data["labels"], data["values"]))[0]
     return getAbsoluteChoropleth(
         **{
-            "locations": df["State"],
-            "z": df[ages],
+            "locations": data["locations"],
+            "z": data["z"],
             "customdata": customdata,
-            "geojson": states,  # switches over in year == 2005
+            "geojson": getGeometry("age-group"),  # switches over in year == 2005
             "year": year,
             "ages": ages,
-            "total": total,
+            "total": data["total"],
             "zmax": 500,
             "zmin": 0,
         }
     )
 
 
-@app.callback(
-    Output("choropleth-abs-district", "figure"),
-    [Input("year-abs-district", "value"), Input("ages-abs-district", "value")],
-)
-def display_choropleth_district(year, ages):
-    df = (
-        dfDistrictsValue[dfDistrictsValue.Year == str(year)]
-        .fillna(0)
-        .replace(np.inf, 99999.99)
-    )
+@choroplethCallback("abs-district")
+@prerendered("abs-district")
+def display_choropleth_abs_district(year, ages):
+    data = choroplethData("abs-district", year, ages)
     # customdata is for additional info in the hover
-    customdata = np.dstack(
-        (
-            list(df["District"]),
-            dfDistrictsValue[dfDistrictsValue.Year == str(year)][ages],
-        )
-    )[0]
-    total = np.sum(dfDistrictsValue[dfDistrictsValue.Year == str(year)][ages])
+    customdata = np.dstack((data["labels"], data["values"]))[0]
     return getAbsoluteChoropleth(
         **{
-            "locations": df["District"],
-            "z": df[ages],
+            "locations": data["locations"],
+            "z": data["z"],
             "customdata": customdata,
-            "geojson": districts,
+            "geojson": getGeometry("abs-district"),
             "year": year,
             "ages": ages,
-            "total": total,
+            "total": data["total"],
             "zmax": 15000,
             "zmin": 0,
         }
     )
 
 
+@lru_cache(maxsize=16)
+def animatedFigure(view, ages=None):
+    """
+    a view's figure for every year of an age group at once, as the frames of
+    an animation
+    """
+    minYear, maxYear = VIEWS[view]["years"]
+    figures = {
+        year: getFigure(view, year, ages) for year in range(minYear, maxYear + 1)
+    }
+    return getAnimation(figures, getGeometry(view))
+
+
+def playCallback(view):
+    """
+    register the callback swapping a view's choropleth for one animating
+    through every year when its play button is pressed
+    """
+    state = [State(f"ages-{view}", "value")] if VIEWS[view]["ages"] else []
+
+    def play(_, ages=None):
+        return animatedFigure(view, ages)
+
+    # named like the display_choropleth_* callbacks, e.g. play_abs_district
+    play.__name__ = f"play_{view.replace('-', '_')}"
+    app.callback(
+        Output(f"choropleth-{view}", "figure", allow_duplicate=True),
+        Input(f"play-{view}", "n_clicks"),
+        state,
+        prevent_initial_call=True,
+    )(play)
+
+
+for view in VIEWS:
+    playCallback(view)
+
+
+@lru_cache(maxsize=None)
+def drilldownFigure(level, region):
+    """
+    a region's registrations in every year, by age group, from its series in
+    the registration arrays; the region must be in the data, so the cache only
+    ever holds one figure per region
+    """
+    registrations = getRegistrations(level)
+    series = registrations.series(region)
+    return json.loads(
+        getDrilldown(
+            registrations.regionLabels[registrations.regionIndex[region]],
+            registrations.years.tolist(),
+            {
+                ages: toList(series[:, i])
+                for ages, i in registrations.ages.items()
+                if not np.isnan(series[:, i]).all()
+            },
+        ).to_json()
+    )
+
+
+def drilldownCallback(view):
+    """
+    register the callback showing the trend of a region below a view's
+    choropleth when it is clicked
+    """
+
+    def drilldown(clickData):
+        points = (clickData or {}).get("points") or [{}]
+        location = points[0].get("location")
+        level = VIEWS[view]["level"]
+        # clickData comes from the client; only look up regions in the data
+        if not isinstance(location, str) or (
+            location not in getRegistrations(level).regionIndex
+        ):
+            raise PreventUpdate
+        return dcc.Graph(
+            figure=drilldownFigure(level, location),
+            config={"displayModeBar": False, "scrollZoom": False},
+        )
+
+    drilldown.__name__ = f"drilldown_{view.replace('-', '_')}"
+    app.callback(
+        Output(f"drilldown-{view}", "children"),
+        Input(f"choropleth-{view}", "clickData"),
+        prevent_initial_call=True,
+    )(drilldown)
+
+
+for view in VIEWS:
+    drilldownCallback(view)
+
+
+def toList(values):
+    """
+    convert values to a JSON-safe list, with missing values as None
+    """
+    return [None if np.isnan(x) else round(float(x), 4) for x in values]
+
+
+@lru_cache(maxsize=None)
+def viewData(view):
+    """
+    everything needed to draw a view client-side: its figure without the
+    per-year data, plus the regions, values and hover info of every year and
+    age group
+    """
+    spec = VIEWS[view]
+    minYear, maxYear = spec["years"]
+    args = (maxYear, spec["ages"][0]) if spec["ages"] else (maxYear,)
+    template = json.loads(RENDERERS[view](*args).to_json())
+    for key in ["locations", "z", "customdata"]:
+        template["data"][0].pop(key)
+    template["data"][0]["hoverlabel"].pop("bgcolor")
+
+    change = VIEWS[view]["change"]
+    years = {}
+    for year in range(minYear, maxYear + 1):
+        for ages in spec["ages"] or ["Total"]:
+            data = choroplethData(view, year, ages)
+            entry = years.setdefault(
+                year,
+                {
+                    "locations": list(data["locations"]),
+                    "labels": data["labels"],
+                    "ages": {},
+                },
+            )
+            entry["ages"][ages] = {
+                "z": toList(data["z"]),
+                "values": toList(data["values"]),
+                "changes": toList(data["changes"]) if change else None,
+                "summary": float(data["overall_change" if change else "total"]),
+            }
+    return {
+        "template": template,
+        "kind": "change" if change else "absolute",
+        "ages": bool(spec["ages"]),
+        "colorscale": colors.diverging.RdBu if change else colors.sequential.Blues,
+        "geometryFrom": None if change else GEOMETRY_FROM,
+        "years": years,
+    }
+
+
+def gzipResponse(blob, mimetype="application/json", etag=None):
+    """
+    respond with already gzip'ed JSON (or another mimetype), decompressing it
+    for the rare browser that does not accept gzip; compressing it again is
+    skipped either way. An etag is suffixed with the encoding sent, since the
+    gzip'ed and decompressed bodies are different representations
+    """
+    if "gzip" not in request.accept_encodings:
+        response = server.response_class(gzip.decompress(blob))
+    else:
+        response = server.response_class(blob)
+        response.headers["Content-Encoding"] = "gzip"
+        etag = etag and f"{etag}-gz"
+    if etag:
+        response.set_etag(etag)
+    response.mimetype = mimetype
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@server.route("/figures/<view>/<int:year>/<ages>")
+def serve_figure(view, year, ages):
+    """
+    serve the gzip'ed figure JSON for a view directly, without going through
+    pandas or Plotly when it has been prerendered
+    """
+    if view not in VIEWS:
+        abort(404)
+    minYear, maxYear = VIEWS[view]["years"]
+    viewAges = VIEWS[view]["ages"]
+    if not minYear <= year <= maxYear or ages not in (viewAges or ["Total"]):
+        abort(404)
+    blob = readFigure(view, year, ages)
+    if blob is None:
+        args = (year, ages) if viewAges else (year,)
+        blob = gzip.compress(RENDERERS[view](*args).to_json().encode("utf-8"))
+    return gzipResponse(blob)
+
+
+@server.route("/geometry/<name>-<level>.<fingerprint>.topojson")
+def serve_geometry(name, level, fingerprint):
+    """
+    serve a simplified TopoJSON; the fingerprint in the URL changes whenever
+    the file does, so it can be cached indefinitely
+    """
+    try:
+        currentFingerprint = geometryFile(name, level)[1]
+    except FileNotFoundError:
+        abort(404)
+    if fingerprint != currentFingerprint:
+        abort(404)
+    response = gzipResponse(compressedGeometry(name, level), etag=currentFingerprint)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+@server.route("/api/<any(registrations, change):endpoint>")
+def serve_api(endpoint):
+    """
+    serve registrations (or their change from the year before) as JSON or
+    CSV, filtered by the year, ages, level and metric query arguments
+    """
+    try:
+        query = parseQuery(endpoint, request.args)
+    except QueryError as e:
+        abort(400, str(e))
+    blob, etag, mimetype = apiResponse(*query)
+    response = gzipResponse(blob, mimetype, etag)
+    response.headers["Cache-Control"] = API_CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+@server.route("/metrics")
+def serve_metrics():
+    """
+    serve the callback and figure cache metrics of every worker, for Prometheus
+    """
+    metrics, contentType = metricsResponse()
+    return server.response_class(metrics, content_type=contentType)
+
+
+instrumentCallbacks(app)
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,101 @@
+// Client-side choropleths, used when the app runs with CLIENTSIDE set: each
+// tab ships its view's data (see viewData in app.py) into a dcc.Store, and
+// these functions redraw the figure from it without a server round trip.
+// They mirror getChoropleth/getAbsoluteChoropleth in components.py.
+
+function unlabelRgb(color) {
+    return color.match(/[\d.]+/g).map(Number);
+}
+
+function intermediateColor(low, high, fraction) {
+    const [l, h] = [unlabelRgb(low), unlabelRgb(high)];
+    return `rgb(${l.map((x, i) => x + fraction * (h[i] - x)).join(", ")})`;
+}
+
+// approximately get appropriate color on scale for hover background
+function divergingColor(percent, range, c) {
+    const half = Math.floor(c.length / 2);
+    if (percent === 0) {
+        return c[half + 1];
+    }
+    // exclude halfway point from color scale
+    c = c.slice(0, half + 1).concat(c.slice(half + 2));
+    const divFactor = range / c.length;
+    // prevent out of bounds indexing
+    const shift = Math.min(Math.max(percent + range / 2, 0), range - 1);
+    const lowIndex = Math.floor(shift / divFactor);
+    if (lowIndex >= c.length - 1) {
+        return c[c.length - 1];
+    }
+    return intermediateColor(
+        c[lowIndex],
+        c[lowIndex + 1],
+        shift / divFactor - lowIndex
+    );
+}
+
+// approximately get appropriate color on scale for hover background
+function absoluteColor(value, range, c) {
+    const val = (c.length - 1) * (value / range);
+    const lowIndex = Math.floor(val);
+    if (lowIndex >= c.length - 1) {
+        return c[c.length - 1];
+    }
+    return intermediateColor(c[lowIndex], c[lowIndex + 1], val - lowIndex);
+}
+
+function title(data, year, ages, summary) {
+    const label = data.ages ? (ages === "Total" ? "All Ages" : ages) : "";
+    if (data.kind === "change") {
+        return (
+            `<br><b>${year}</b></br><b>${label}</b><br /> <br />` +
+            `<b>Overall Percent Change</b>:</br><b>${summary.toFixed(2)}</b>%`
+        );
+    }
+    if (data.ages) {
+        return (
+            `<b>${year}</b><br /><b>${label}</b><br /><br></br>` +
+            `<b>${summary} Registrations</b>`
+        );
+    }
+    return `<br><b>${year}</b></br><br /><b>${summary} Registrations</b>`;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    choropleth: {
+        render: function (year, ages, data) {
+            if (!data || !data.years[year] || !data.years[year].ages[ages]) {
+                return window.dash_clientside.no_update;
+            }
+            const entry = data.years[year];
+            const values = entry.ages[ages];
+            const fig = JSON.parse(JSON.stringify(data.template));
+            const trace = fig.data[0];
+            const range = trace.zmax - trace.zmin;
+
+            trace.locations = entry.locations;
+            trace.z = values.z;
+            // customdata is for additional info in the hover
+            trace.customdata = entry.labels.map((label, i) =>
+                values.changes
+                    ? [label, values.values[i], values.changes[i]]
+                    : [label, values.values[i]]
+            );
+            trace.hoverlabel.bgcolor = values.z.map((z) =>
+                data.kind === "change"
+                    ? divergingColor(z, range, data.colorscale)
+                    : absoluteColor(z, range, data.colorscale)
+            );
+            if (data.geometryFrom && year < data.geometryFrom) {
+                // no geojson, use default states
+                trace.geojson = false;
+                trace.locationmode = "USA-states";
+            }
+            fig.layout.title.text = title(data, year, ages, values.summary);
+            return fig;
+        },
+        renderYear: function (year, data) {
+            return window.dash_clientside.choropleth.render(year, "Total", data);
+        },
+    },
+});
@@ -0,0 +1,74 @@
+// Decodes the TopoJSON geometry the figures reference (see toTopology in
+// source/simplify_geometry.py) into the geojson Plotly draws. Plotly looks a
+// geojson URL up in window.PlotlyGeoAssets before fetching it, and waits on
+// any lookup that is "pending"; looking a .topojson URL up there starts
+// fetching and decoding it instead, and Plotly picks up the result.
+
+function decodeArc(topology, arc) {
+    const [kx, ky] = topology.transform.scale;
+    const [x0, y0] = topology.transform.translate;
+    let x = 0;
+    let y = 0;
+    return arc.map(([dx, dy]) => {
+        x += dx;
+        y += dy;
+        return [x * kx + x0, y * ky + y0];
+    });
+}
+
+function decodeTopology(topology) {
+    const arcs = topology.arcs.map((arc) => decodeArc(topology, arc));
+    // a ring is its arcs joined end to end, ~i being arc i reversed
+    const ring = (indices) =>
+        indices.flatMap((i, n) => {
+            const points = i >= 0 ? arcs[i] : arcs[~i].slice().reverse();
+            return n ? points.slice(1) : points;
+        });
+    return {
+        type: "FeatureCollection",
+        features: topology.objects.regions.geometries.map((geometry) => ({
+            type: "Feature",
+            properties: geometry.properties,
+            geometry: {
+                type: "MultiPolygon",
+                coordinates: geometry.arcs.map((polygon) => polygon.map(ring)),
+            },
+        })),
+    };
+}
+
+function loadTopology(assets, url) {
+    assets[url] = "pending";
+    fetch(url)
+        .then((response) => {
+            if (!response.ok) {
+                throw new Error(`${response.status} fetching ${url}`);
+            }
+            return response.json();
+        })
+        .then((topology) => {
+            assets[url] = decodeTopology(topology);
+        })
+        .catch(() => {
+            // left "pending": Plotly looks it up every 50ms while it waits, and
+            // each lookup of a missing URL would fetch it again. Its wait
+            // times out instead (a 404 is a stale fingerprint, which fetching
+            // again won't fix)
+        });
+}
+
+window.PlotlyGeoAssets = new Proxy(
+    window.PlotlyGeoAssets || { topojson: {} },
+    {
+        get: function (assets, url) {
+            if (
+                typeof url === "string" &&
+                url.endsWith(".topojson") &&
+                !(url in assets)
+            ) {
+                loadTopology(assets, url);
+            }
+            return assets[url];
+        },
+    }
+);
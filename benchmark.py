@@ -0,0 +1,169 @@
+# Run with `python benchmark.py` to time every choropleth callback for every
+# year/age group combination, and report its latency, payload and allocations.
+#
+#   python benchmark.py --save benchmarks/callbacks.json     save a baseline
+#   python benchmark.py --compare benchmarks/callbacks.json  check against one
+#
+# --live renders every figure instead of serving the prerendered ones.
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+import app
+from components import VIEWS
+from figure_cache import RENDERERS
+
+# the callback drawing each view's choropleth
+CALLBACKS = {
+    "06": app.display_choropleth_06,
+    "91": app.display_choropleth_91,
+    "district": app.display_choropleth_district,
+    "overall": app.display_choropleth_overall,
+    "age-group": app.display_choropleth_age_group,
+    "abs-district": app.display_choropleth_abs_district,
+}
+
+# how much slower/bigger than the baseline a result may be before it counts
+# as a regression; latencies also get some slack for timer noise
+TOLERANCE = 0.25
+LATENCY_SLACK_MS = 0.5
+
+
+def combinations(view):
+    """
+    every set of arguments a view's callback can be called with
+    """
+    minYear, maxYear = VIEWS[view]["years"]
+    ages = VIEWS[view]["ages"]
+    for year in range(minYear, maxYear + 1):
+        if ages is None:
+            yield (year,)
+        else:
+            for age in ages:
+                yield (year, age)
+
+
+def benchmarkCallback(f, calls, repeat: int):
+    """
+    time every call of f, then measure the peak memory each call allocates
+    (serializing its response included) and how big that response is once
+    serialized the way Dash does
+    """
+    times = []
+    for _ in range(repeat):
+        for args in calls:
+            start = time.perf_counter()
+            f(*args)
+            times.append((time.perf_counter() - start) * 1000)
+
+    payloads, peaks = [], []
+    for args in calls:
+        tracemalloc.start()
+        payloads.append(len(to_json_plotly(f(*args)).encode("utf-8")))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "calls": len(times),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "payload_bytes": {
+            "mean": float(np.mean(payloads)),
+            "max": int(np.max(payloads)),
+        },
+        "peak_alloc_bytes": {
+            "mean": float(np.mean(peaks)),
+            "max": int(np.max(peaks)),
+        },
+    }
+
+
+def benchmark(views=VIEWS, repeat: int = 3, live: bool = False):
+    """
+    benchmark the callback of every view
+    """
+    results = {}
+    for view in views:
+        f = RENDERERS[view] if live else CALLBACKS[view]
+        calls = list(combinations(view))
+        f(*calls[0])  # warm up
+        results[f.__name__] = dict(view=view, **benchmarkCallback(f, calls, repeat))
+    return {"live": live, "repeat": repeat, "callbacks": results}
+
+
+def compare(results, baseline, tolerance: float = TOLERANCE):
+    """
+    list every way results regressed from a baseline
+    """
+    regressions = []
+    if results["live"] != baseline["live"]:
+        return [f"baseline was taken with live={baseline['live']}"]
+    for name, result in results["callbacks"].items():
+        base = baseline["callbacks"].get(name)
+        if base is None:
+            continue
+        factor = 1 + tolerance
+        checks = [
+            ("p50_ms", result["p50_ms"], base["p50_ms"] * factor + LATENCY_SLACK_MS),
+            ("p95_ms", result["p95_ms"], base["p95_ms"] * factor + LATENCY_SLACK_MS),
+            (
+                "payload_bytes.max",
+                result["payload_bytes"]["max"],
+                base["payload_bytes"]["max"],
+            ),
+            (
+                "peak_alloc_bytes.max",
+                result["peak_alloc_bytes"]["max"],
+                base["peak_alloc_bytes"]["max"] * factor,
+            ),
+        ]
+        for metric, value, limit in checks:
+            if value > limit:
+                regressions.append(
+                    f"{name} {metric}: {value:,.2f} (limit {limit:,.2f})"
+                )
+    return regressions
+
+
+def report(results):
+    """
+    print a table of results
+    """
+    print(
+        f"{'callback':<34}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'payload B':>11}{'peak alloc B':>14}"
+    )
+    for name, r in results["callbacks"].items():
+        print(
+            f"{name:<34}{r['calls']:>7}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['payload_bytes']['max']:>11,}{r['peak_alloc_bytes']['max']:>14,}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the choropleth callbacks")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--save", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", help="check the results against a baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = benchmark(repeat=args.repeat, live=args.live)
+    report(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            sys.exit(1)
@@ -1,15 +1,10 @@
-from functools import reduce
-from math import ceil, floor
+from functools import lru_cache, reduce
 from dash import dcc
 from dash import html
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import plotly.express as px
 import plotly.colors as colors
-import pandas as pd
 import numpy as np
-import json
-import time
 
 # HTML Layout
 INDEX_STRING = """
@@ -40,6 +35,79 @@ INDEX_STRING = """
 </html>
 """
 
+AGE_GROUPS = [
+    "Total",
+    "20&Over",
+    "19",
+    "17-18",
+    "15-16",
+    "13-14",
+    "11-12",
+    "9-10",
+    "7-8",
+    "6&U",
+]
+
+# every choropleth view, keyed by the suffix of its component ids
+# (ex. "06" -> "choropleth-06", "year-06", "ages-06") and drawn in tab; ages is
+# None for views without an age group dropdown; level is whether states or
+# districts are drawn, and change whether the percent change is mapped instead
+# of registrations; geometry is the (geojson, level of detail) drawn, or None
+# for views using plotly's own USA states
+VIEWS = {
+    "06": {
+        "tab": "tab-06-22",
+        "years": (2006, 2022),
+        "ages": AGE_GROUPS,
+        "level": "state",
+        "change": True,
+        "geometry": ("states", "medium"),
+    },
+    "91": {
+        "tab": "tab-91-04",
+        "years": (1991, 2004),
+        "ages": None,
+        "level": "state",
+        "change": True,
+        "geometry": None,
+    },
+    "district": {
+        "tab": "tab-districts",
+        "years": (2008, 2022),
+        "ages": AGE_GROUPS,
+        "level": "district",
+        "change": True,
+        "geometry": ("districts", "low"),
+    },
+    "overall": {
+        "tab": "tab-overall",
+        "years": (1990, 2022),
+        "ages": None,
+        "level": "state",
+        "change": False,
+        "geometry": ("states", "medium"),
+    },
+    "age-group": {
+        "tab": "tab-age-group",
+        "years": (2005, 2022),
+        "ages": AGE_GROUPS[1:],
+        "level": "state",
+        "change": False,
+        "geometry": ("states", "medium"),
+    },
+    "abs-district": {
+        "tab": "tab-abs-districts",
+        "years": (2007, 2022),
+        "ages": AGE_GROUPS,
+        "level": "district",
+        "change": False,
+        "geometry": ("districts", "low"),
+    },
+}
+
+# before this year, absolute views draw plotly's own states instead of geometry
+GEOMETRY_FROM = 2005
+
 
 def flattenDictionary(d):
     """
@@ -53,51 +121,56 @@ def flattenDictionary(d):
     return reduce(f, d)
 
 
-def getDivergingColor(percent, range):
+# hover backgrounds are looked up in a table of this many colors between each
+# pair of neighboring colors on a scale, instead of being interpolated per region
+COLOR_STEPS = 256
+
+
+@lru_cache(maxsize=None)
+def colorTable(scale):
+    """
+    get the colors (as rgb strings) at every step along a colorscale, so that
+    the color at position p (in units of the scale's colors) is
+    table[round(p * COLOR_STEPS)]
+    """
+    rgb = np.array([colors.unlabel_rgb(c) for c in scale])
+    positions = np.arange((len(scale) - 1) * COLOR_STEPS + 1) / COLOR_STEPS
+    table = np.column_stack(
+        [np.interp(positions, np.arange(len(scale)), channel) for channel in rgb.T]
+    )
+    return np.array([colors.label_rgb(c) for c in np.rint(table).astype("int")])
+
+
+def lookupColors(scale, positions):
     """
-    approximately get appropriate color on scale for hover background
+    get the colors at positions along a colorscale, clipped to its ends
     """
+    positions = np.clip(np.nan_to_num(positions), 0, len(scale) - 1)
+    return colorTable(scale)[np.rint(positions * COLOR_STEPS).astype("int")]
+
+
+def getDivergingColors(percents, range):
+    """
+    approximately get appropriate colors on scale for hover backgrounds
+    """
+    percents = np.asarray(percents, dtype="float")
     c = colors.diverging.RdBu
-    if percent == 0:
-        return c[len(c) // 2 + 1]
+    half = len(c) // 2
     # exclude halfway point from color scale
-    c = c[: len(c) // 2 + 1] + c[len(c) // 2 + 2 :]
-    div_factor = range / len(c)
-    shift = percent + range / 2
+    scale = tuple(c[: half + 1] + c[half + 2 :])
     # prevent out of bounds indexing
-    if shift > range - 1:
-        shift = range - 1
-    elif shift < 0:
-        shift = 0
-    low_index = floor(shift / div_factor)
-    if low_index == len(c) - 1:  # get maximum color
-        return c[low_index]
-    return colors.label_rgb(  # find color proportionally in between
-        colors.find_intermediate_color(
-            colors.unlabel_rgb(c[low_index]),
-            colors.unlabel_rgb(c[low_index + 1]),
-            shift / div_factor - low_index,
-        )
-    )
+    shift = np.clip(percents + range / 2, 0, range - 1)
+    found = lookupColors(scale, shift / (range / len(scale)))
+    return np.where(percents == 0, c[half + 1], found).tolist()
 
 
-def getAbsoluteColor(value, range):
+def getAbsoluteColors(values, range):
     """
-    approximately get appropriate color on scale for hover background
+    approximately get appropriate colors on scale for hover backgrounds
     """
-    c = colors.sequential.Blues
-    percent = value / range
-    if percent > 1:
-        return c[len(c) - 1]
-    val = (len(c) - 1) * percent
-    low_index = floor(val)
-    return colors.label_rgb(  # find color proportionally in between
-        colors.find_intermediate_color(
-            colors.unlabel_rgb(c[low_index]),
-            colors.unlabel_rgb(c[low_index + 1]),
-            val - low_index,
-        )
-    )
+    scale = tuple(colors.sequential.Blues)
+    positions = (len(scale) - 1) * np.asarray(values, dtype="float") / range
+    return lookupColors(scale, positions).tolist()
 
 
 def createSlider(minYear, maxYear, suffix):
@@ -111,6 +184,98 @@ def createSlider(minYear, maxYear, suffix):
     )
 
 
+def createPlayButton(suffix):
+    return html.Button("Play all years", id="play" + suffix, n_clicks=0)
+
+
+def createDrilldown(suffix):
+    # filled in with a region's trend once one is clicked on the map
+    return html.Div(id="drilldown" + suffix)
+
+
+# what changes in a choropleth from one year to the next
+FRAME_KEYS = ["locations", "z", "customdata", "hoverlabel"]
+
+
+def getAnimation(figures, geojson):
+    """
+    combine the figures of every year (a dict of year -> figure dict, in
+    order) into one figure animating through them. Frames only carry what
+    changes between years, so the geometry (and the rest of the figure) is
+    sent once
+    """
+    years = list(figures)
+    first = figures[years[0]]
+    trace = dict(first["data"][0])
+    if geojson:  # even when the first year uses plotly's own states
+        trace["geojson"] = geojson
+    frames = []
+    for year, fig in figures.items():
+        data = {key: fig["data"][0][key] for key in FRAME_KEYS}
+        # switch between the geojson and plotly's own states each year
+        data["locationmode"] = fig["data"][0].get("locationmode", "geojson-id")
+        frames.append(
+            {
+                "name": str(year),
+                "data": [data],
+                "layout": {"title": {"text": fig["layout"]["title"]["text"]}},
+            }
+        )
+
+    # choropleths can't transition smoothly, so every frame is redrawn
+    frame = {"frame": {"duration": 0, "redraw": True}, "transition": {"duration": 0}}
+    layout = dict(first["layout"])
+    layout["margin"] = dict(layout["margin"], b=60)
+    layout["updatemenus"] = [
+        {
+            "type": "buttons",
+            "direction": "left",
+            "x": 0.1,
+            "y": 0,
+            "xanchor": "right",
+            "yanchor": "top",
+            "pad": {"r": 10, "t": 40},
+            "buttons": [
+                {
+                    "label": "Play",
+                    "method": "animate",
+                    "args": [
+                        None,
+                        dict(
+                            frame,
+                            frame={"duration": 700, "redraw": True},
+                            fromcurrent=True,
+                        ),
+                    ],
+                },
+                {
+                    "label": "Pause",
+                    "method": "animate",
+                    "args": [[None], dict(frame, mode="immediate")],
+                },
+            ],
+        }
+    ]
+    layout["sliders"] = [
+        {
+            "x": 0.1,
+            "y": 0,
+            "len": 0.9,
+            "pad": {"t": 30},
+            "currentvalue": {"visible": False},
+            "steps": [
+                {
+                    "label": str(year),
+                    "method": "animate",
+                    "args": [[str(year)], dict(frame, mode="immediate")],
+                }
+                for year in years
+            ],
+        }
+    ]
+    return {"data": [trace], "layout": layout, "frames": frames}
+
+
 def createTab(tab):
     if tab == "tab-06-22":
         return dbc.Container(
@@ -124,18 +289,7 @@ def createTab(tab):
                         clearable=False,
                         options=[
                             {"label": x if x != "Total" else "All Ages", "value": x}
-                            for x in [
-                                "Total",
-                                "20&Over",
-                                "19",
-                                "17-18",
-                                "15-16",
-                                "13-14",
-                                "11-12",
-                                "9-10",
-                                "7-8",
-                                "6&U",
-                            ]
+                            for x in AGE_GROUPS
                         ],
                         value="Total",
                         id="ages-06",
@@ -144,7 +298,9 @@ def createTab(tab):
                         id="choropleth-06",
                         config={"displayModeBar": False, "scrollZoom": False},
                     ),
-                    createSlider(2006, 2022, "-06"),
+                    createSlider(*VIEWS["06"]["years"], "-06"),
+                    createPlayButton("-06"),
+                    createDrilldown("-06"),
                 ],
             )
         )
@@ -159,7 +315,9 @@ def createTab(tab):
                         id="choropleth-91",
                         config={"displayModeBar": False, "scrollZoom": False},
                     ),
-                    createSlider(1991, 2004, suffix="-91"),
+                    createSlider(*VIEWS["91"]["years"], suffix="-91"),
+                    createPlayButton("-91"),
+                    createDrilldown("-91"),
                 ]
             )
         )
@@ -175,18 +333,7 @@ def createTab(tab):
                         clearable=False,
                         options=[
                             {"label": x if x != "Total" else "All Ages", "value": x}
-                            for x in [
-                                "Total",
-                                "20&Over",
-                                "19",
-                                "17-18",
-                                "15-16",
-                                "13-14",
-                                "11-12",
-                                "9-10",
-                                "7-8",
-                                "6&U",
-                            ]
+                            for x in AGE_GROUPS
                         ],
                         value="Total",
                         id="ages-district",
@@ -195,7 +342,9 @@ def createTab(tab):
                         id="choropleth-district",
                         config={"displayModeBar": False, "scrollZoom": False},
                     ),
-                    createSlider(2008, 2022, "-district"),
+                    createSlider(*VIEWS["district"]["years"], "-district"),
+                    createPlayButton("-district"),
+                    createDrilldown("-district"),
                 ],
             )
         )
@@ -210,7 +359,9 @@ def createTab(tab):
                         id="choropleth-overall",
                         config={"displayModeBar": False, "scrollZoom": False},
                     ),
-                    createSlider(1990, 2022, suffix="-overall"),
+                    createSlider(*VIEWS["overall"]["years"], suffix="-overall"),
+                    createPlayButton("-overall"),
+                    createDrilldown("-overall"),
                 ],
             )
         )
@@ -226,17 +377,7 @@ def createTab(tab):
                         clearable=False,
                         options=[
                             {"label": x if x != "Total" else "All Ages", "value": x}
-                            for x in [
-                                "20&Over",
-                                "19",
-                                "17-18",
-                                "15-16",
-                                "13-14",
-                                "11-12",
-                                "9-10",
-                                "7-8",
-                                "6&U",
-                            ]
+                            for x in VIEWS["age-group"]["ages"]
                         ],
                         value="20&Over",
                         id="ages-age-group",
@@ -245,7 +386,9 @@ def createTab(tab):
                         id="choropleth-age-group",
                         config={"displayModeBar": False, "scrollZoom": False},
                     ),
-                    createSlider(2005, 2022, suffix="-age-group"),
+                    createSlider(*VIEWS["age-group"]["years"], suffix="-age-group"),
+                    createPlayButton("-age-group"),
+                    createDrilldown("-age-group"),
                 ],
             )
         )
@@ -261,18 +404,7 @@ def createTab(tab):
                         clearable=False,
                         options=[
                             {"label": x if x != "Total" else "All Ages", "value": x}
-                            for x in [
-                                "Total",
-                                "20&Over",
-                                "19",
-                                "17-18",
-                                "15-16",
-                                "13-14",
-                                "11-12",
-                                "9-10",
-                                "7-8",
-                                "6&U",
-                            ]
+                            for x in AGE_GROUPS
                         ],
                         value="Total",
                         id="ages-abs-district",
@@ -281,7 +413,11 @@ def createTab(tab):
                         id="choropleth-abs-district",
                         config={"displayModeBar": False, "scrollZoom": False},
                     ),
-                    createSlider(2007, 2022, suffix="-abs-district"),
+                    createSlider(
+                        *VIEWS["abs-district"]["years"], suffix="-abs-district"
+                    ),
+                    createPlayButton("-abs-district"),
+                    createDrilldown("-abs-district"),
                 ],
             )
         )
@@ -302,7 +438,7 @@ def getChoropleth(
             },
         },
         hoverlabel={
-            "bgcolor": list(z.apply(getDivergingColor, args=(zmax - zmin,))),
+            "bgcolor": getDivergingColors(z, zmax - zmin),
             "font": {"family": "Public Sans"},
         },
         geojson=geojson,
@@ -341,7 +477,7 @@ def getAbsoluteChoropleth(
     locations, z, customdata, geojson, year, ages, total, zmax, zmin
 ):
     if geojson:
-        geojson = False if year < 2005 else geojson
+        geojson = False if year < GEOMETRY_FROM else geojson
 
     choropleth = go.Choropleth(
         colorscale="Blues",
@@ -354,7 +490,7 @@ def getAbsoluteChoropleth(
             },
         },
         hoverlabel={
-            "bgcolor": list(z.apply(getAbsoluteColor, args=((zmax - zmin),))),
+            "bgcolor": getAbsoluteColors(z, zmax - zmin),
             "font": {"family": "Public Sans"},
         },
         geojson=geojson,
@@ -386,3 +522,32 @@ def getAbsoluteChoropleth(
         },
     )
     return fig
+
+
+def getDrilldown(label, years, series):
+    """
+    line chart of a region's registrations over the years, one line per age
+    group (a dict of age group -> registrations of every year)
+    """
+    fig = go.Figure(
+        [
+            go.Scatter(
+                x=years,
+                y=values,
+                name=ages if ages != "Total" else "All Ages",
+                mode="lines+markers",
+                connectgaps=False,
+                hovertemplate="%{y:,}",
+            )
+            for ages, values in series.items()
+        ]
+    )
+    fig.update_layout(
+        font={"family": "Public Sans"},
+        title={"text": f"<b>{label}</b> Registrations by Age Group", "x": 0.5},
+        xaxis={"dtick": 2},
+        yaxis={"rangemode": "tozero", "tickformat": ","},
+        hovermode="x unified",
+        margin={"r": 0, "t": 60, "l": 0, "b": 0},
+    )
+    return fig
@@ -0,0 +1,171 @@
+# Run with `python export_static.py [directory]` to export the whole app as a
+# static site (into ./site/ by default) that any static file host can serve,
+# without Dash or gunicorn. Every view's figure for every year and age group
+# is written out as JSON, along with its animation through every year, the
+# geometry the figures share, Plotly and the page in ./static_site/, whose
+# script wires the tabs, slider, dropdown and play button up in the browser.
+#
+# Every JSON/JS/TopoJSON file gets a gzip'ed copy next to it (x.json.gz), for hosts
+# that serve those in place of compressing on the fly (e.g. nginx's
+# gzip_static).
+
+import gzip
+import inspect
+import json
+import os
+import shutil
+import sys
+from urllib.parse import quote
+
+from dash import dcc, html
+from dash.development.base_component import Component
+
+import app
+from components import VIEWS, createTab
+from figure_cache import getFigure
+from geometry import geometryFile, geometryUrl
+
+EXPORT_PATH = "./site/"
+PAGE_PATH = "./static_site/"
+PLOTLY_JS = os.path.join(os.path.dirname(dcc.__file__), "plotly.min.js")
+
+
+def writeFile(directory, path, contents):
+    """
+    write contents (bytes) to a path under directory, with a gzip'ed copy of
+    any JSON or JS next to it
+    """
+    path = os.path.join(directory, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(contents)
+    if path.endswith((".json", ".js", ".topojson")):
+        with open(f"{path}.gz", "wb") as f:
+            f.write(gzip.compress(contents, compresslevel=9, mtime=0))
+
+
+def writeJson(directory, path, data):
+    writeFile(directory, path, json.dumps(data, separators=(",", ":")).encode())
+
+
+def relativeGeometry(fig):
+    """
+    point a figure (or animation) at geometry relative to the page rather than
+    the app's root, so the site can be served from any directory
+    """
+    data = [
+        dict(trace, geojson=trace["geojson"].lstrip("/"))
+        if trace.get("geojson")
+        else trace
+        for trace in fig["data"]
+    ]
+    return dict(fig, data=data)
+
+
+def findComponent(component, kind):
+    """
+    first component of a kind in a Dash component tree, or None
+    """
+    if isinstance(component, kind):
+        return component
+    children = getattr(component, "children", None)
+    if not isinstance(children, (list, tuple)):
+        children = [children]
+    for child in children:
+        if isinstance(child, Component):
+            found = findComponent(child, kind)
+            if found is not None:
+                return found
+    return None
+
+
+def viewPage(tab):
+    """
+    the title, age groups and default age group of the view on a tab, as
+    createTab lays it out
+    """
+    view = next(view for view, spec in VIEWS.items() if spec["tab"] == tab)
+    content = createTab(tab)
+    dropdown = findComponent(content, dcc.Dropdown)
+    if dropdown is None:  # (components are falsy when they have no children)
+        ages, defaultAges = None, None
+    else:
+        ages = [dict(o, file=quote(o["value"], safe="")) for o in dropdown.options]
+        defaultAges = dropdown.value
+    return {
+        "view": view,
+        "title": findComponent(content, html.H3).children,
+        "years": VIEWS[view]["years"],
+        "ages": ages,
+        "defaultAges": defaultAges,
+    }
+
+
+def siteTabs():
+    """
+    the tabs and subtabs of the app, read from its layout and the callbacks
+    filling in the subtabs so the static page stays in step with them
+    """
+    tabs = app.app.layout.children[0]
+    pages = []
+    for tab in tabs.children:
+        # the subtabs callback, unwrapped from Dash's and the metrics' wrappers
+        update = inspect.unwrap(app.app.callback_map[f"{tab.id}.children"]["callback"])
+        (subtabs,) = update(tab.value)
+        pages.append(
+            {
+                "label": tab.label,
+                "value": tab.value,
+                "defaultSubtab": subtabs.value,
+                "subtabs": [
+                    dict(
+                        label=subtab.label, value=subtab.value, **viewPage(subtab.value)
+                    )
+                    for subtab in subtabs.children
+                ],
+            }
+        )
+    return {"defaultTab": tabs.value, "tabs": pages}
+
+
+def exportView(directory, view):
+    """
+    write the figure of every year and age group of a view, and its animation
+    through every year for each age group
+    """
+    minYear, maxYear = VIEWS[view]["years"]
+    for ages in VIEWS[view]["ages"] or [None]:
+        name = quote(ages or "Total", safe="")
+        for year in range(minYear, maxYear + 1):
+            fig = relativeGeometry(getFigure(view, year, ages))
+            writeJson(directory, f"figures/{view}/{year}-{name}.json", fig)
+        animation = relativeGeometry(app.animatedFigure(view, ages))
+        writeJson(directory, f"figures/{view}/all-{name}.json", animation)
+
+
+def export(directory=EXPORT_PATH, views=VIEWS):
+    """
+    export the app as a static site into directory, replacing what was there
+    """
+    shutil.rmtree(directory, ignore_errors=True)
+    for name in os.listdir(PAGE_PATH):
+        with open(os.path.join(PAGE_PATH, name), "rb") as f:
+            writeFile(directory, name, f.read())
+    for name in ["app.css", "topojson.js"]:
+        with open(f"./assets/{name}", "rb") as f:
+            writeFile(directory, name, f.read())
+    with open(PLOTLY_JS, "rb") as f:
+        writeFile(directory, "plotly.min.js", f.read())
+
+    for geometry in {VIEWS[view]["geometry"] for view in views} - {None}:
+        writeFile(
+            directory, geometryUrl(*geometry).lstrip("/"), geometryFile(*geometry)[0]
+        )
+    writeJson(directory, "site.json", siteTabs())
+    for view in views:
+        exportView(directory, view)
+        print(f"exported {view}")
+
+
+if __name__ == "__main__":
+    export(*sys.argv[1:2])
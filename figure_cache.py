@@ -0,0 +1,151 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+from functools import lru_cache, wraps
+from urllib.parse import quote
+
+from dash.exceptions import PreventUpdate
+
+from components import VIEWS
+from metrics import FIGURE_CACHE
+
+# prerendered figures, written by `python prerender.py`
+FIGURE_PATH = "./data/figures/"
+
+# everything a figure is rendered from; prerendered figures are only served
+# while these are as they were when the figures were written (see inputsStamp)
+FIGURE_INPUTS = [
+    "./data/*.arrow",
+    "./data/geometry/*.topojson",
+    "./app.py",
+    "./components.py",
+    "./geometry.py",
+    "./registrations.py",
+    "./regions.py",
+]
+STAMP_PATH = f"{FIGURE_PATH}stamp"
+
+# view -> undecorated figure function, filled in by @prerendered
+RENDERERS = {}
+
+
+def checkFigure(view, year, ages):
+    """
+    make sure a year/age group (as sent by the client) is one a view has a
+    figure for before it goes anywhere near a path; raises PreventUpdate if not
+    """
+    minYear, maxYear = VIEWS[view]["years"]
+    viewAges = VIEWS[view]["ages"]
+    if (
+        type(year) is not int
+        or not minYear <= year <= maxYear
+        or (ages not in viewAges if viewAges else ages is not None)
+    ):
+        raise PreventUpdate
+
+
+def figurePath(view, year, ages):
+    """
+    location of the gzip'ed figure JSON for a view/year/age group
+    """
+    return f"{FIGURE_PATH}{view}/{year}-{quote(ages or 'Total', safe='')}.json.gz"
+
+
+def inputsStamp():
+    """
+    sha256 of the names and contents of every file in FIGURE_INPUTS
+    """
+    h = hashlib.sha256()
+    for pattern in FIGURE_INPUTS:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, "rb") as f:
+                h.update(path.encode("utf-8") + b"\0" + f.read())
+    return h.hexdigest()
+
+
+def writeStamp():
+    """
+    record what the prerendered figures were rendered from
+    """
+    os.makedirs(FIGURE_PATH, exist_ok=True)
+    with open(STAMP_PATH, "w") as f:
+        f.write(inputsStamp())
+
+
+@lru_cache(maxsize=None)
+def prerenderedFresh():
+    """
+    whether the prerendered figures were rendered from the current data,
+    geometry and code; stale ones reference geometry fingerprints that are no
+    longer served, so they are ignored until `python prerender.py` is rerun
+    """
+    try:
+        with open(STAMP_PATH) as f:
+            return f.read() == inputsStamp()
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def readFigure(view, year, ages):
+    """
+    get the gzip'ed figure JSON for a view/year/age group, or None if it was
+    never prerendered or is stale
+    """
+    if not prerenderedFresh():
+        FIGURE_CACHE.labels(view=view, result="stale").inc()
+        return None
+    try:
+        with open(figurePath(view, year, ages), "rb") as f:
+            blob = f.read()
+    except (FileNotFoundError, NotADirectoryError):
+        FIGURE_CACHE.labels(view=view, result="miss").inc()
+        return None
+    FIGURE_CACHE.labels(view=view, result="hit").inc()
+    return blob
+
+
+def writeFigure(view, year, ages, fig):
+    """
+    save a figure as gzip'ed JSON
+    """
+    path = figurePath(view, year, ages)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(gzip.compress(fig.to_json().encode("utf-8"), mtime=0))
+
+
+def getFigure(view, year, ages=None):
+    """
+    get the figure for a view/year/age group as a dict, prerendered if it can
+    be and rendered live otherwise
+    """
+    checkFigure(view, year, ages)
+    blob = readFigure(view, year, ages)
+    if blob is None:
+        args = (year, ages) if ages else (year,)
+        return json.loads(RENDERERS[view](*args).to_json())
+    return json.loads(gzip.decompress(blob))
+
+
+def prerendered(view):
+    """
+    decorator for a figure function taking (year[, ages]); serves the
+    prerendered figure when there is one, and renders it live otherwise
+    """
+
+    def decorator(render):
+        RENDERERS[view] = render
+
+        @wraps(render)
+        def wrapper(year, *args):
+            checkFigure(view, year, args[0] if args else None)
+            blob = readFigure(view, year, args[0] if args else None)
+            if blob is None:
+                return render(year, *args)
+            return json.loads(gzip.decompress(blob))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,48 @@
+import gzip
+import hashlib
+from functools import lru_cache
+
+from components import VIEWS
+
+# simplified geometry as TopoJSON, built by `source/simplify_geometry.py`;
+# assets/topojson.js decodes it in the browser into the geojson Plotly draws
+GEOMETRY_PATH = "./data/geometry/"
+
+# geometry is only ever referenced by fingerprinted URLs, so browsers may
+# keep them until the next deployment changes the fingerprint
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@lru_cache(maxsize=None)
+def geometryFile(name, level):
+    """
+    get the contents of a simplified TopoJSON at a level of detail ("high",
+    "medium" or "low") and its fingerprint
+    """
+    with open(f"{GEOMETRY_PATH}{name}-{level}.topojson", "rb") as response:
+        contents = response.read()
+    return contents, hashlib.sha256(contents).hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def compressedGeometry(name, level):
+    """
+    get a simplified TopoJSON gzip'ed once, rather than on every request
+    """
+    return gzip.compress(geometryFile(name, level)[0], mtime=0)
+
+
+def geometryUrl(name, level):
+    """
+    fingerprinted URL a simplified TopoJSON is served at
+    """
+    return f"/geometry/{name}-{level}.{geometryFile(name, level)[1]}.topojson"
+
+
+def getGeometry(view):
+    """
+    get the URL of the geometry drawn by a view, or False if it uses plotly's
+    own states
+    """
+    geometry = VIEWS[view]["geometry"]
+    return geometryUrl(*geometry) if geometry else False
@@ -0,0 +1,90 @@
+# gunicorn settings for running the app in production (`gunicorn app:server`
+# picks this file up automatically); see "Serving" in the README for what
+# these were measured to do
+import glob
+import os
+import shutil
+import time
+
+# workers write their metrics here, for /metrics to add up; this has to be set
+# before the app (and prometheus_client) is imported. By default every
+# instance gets its own directory (this file is read by the master, so this
+# is its pid), so two running at once never clear each other's metrics
+METRICS_DIR = f"/tmp/prometheus-metrics-{os.getpid()}"
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", METRICS_DIR)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# load the app (and so the data and geometry) once in the master before
+# forking, so every worker shares those pages copy-on-write instead of
+# loading its own copy
+preload_app = True
+
+# callbacks mostly serve prerendered figures and so spend their time on I/O;
+# threads let a worker serve several of them at once
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("THREADS", 4))
+timeout = 30
+
+# workers are not recycled by default: they hold steady at about 110 MB under
+# load, and a page load makes dozens of requests, so any limit low enough to
+# matter would restart them every few seconds (each costing a ~1 s warmup and
+# the odd dropped request). MAX_REQUESTS turns it on, staggered so workers
+# don't all restart at once
+max_requests = int(os.environ.get("MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+
+def warmup(log):
+    """
+    run the cold paths of the app: Dash's first-request setup, and rendering
+    and serializing one figure per view
+    """
+    from app import CLIENTSIDE, server, viewData
+    from components import VIEWS
+    from figure_cache import RENDERERS
+    from geometry import getGeometry
+
+    start = time.perf_counter()
+    client = server.test_client()
+    client.get("/_dash-layout")
+    client.get("/_dash-dependencies")
+    for view, settings in VIEWS.items():
+        getGeometry(view)
+        year = settings["years"][1]
+        args = (year, "Total") if settings["ages"] else (year,)
+        RENDERERS[view](*args).to_json()
+        if CLIENTSIDE:
+            viewData(view)
+    log.info("warmed up in %.0fms", (time.perf_counter() - start) * 1000)
+
+
+def on_starting(server):
+    # start from nothing rather than the metrics of a previous run
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(path, exist_ok=True)
+    for f in glob.glob(os.path.join(path, "*.db")):
+        os.remove(f)
+
+
+def on_exit(server):
+    # the default directory is only ever used by this instance
+    if os.environ["PROMETHEUS_MULTIPROC_DIR"] == METRICS_DIR:
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+
+def when_ready(server):
+    # in the master, so whatever the warmup loads or caches is shared
+    warmup(server.log)
+
+
+def post_fork(server, worker):
+    # and again in each worker, for anything that does not survive the fork
+    warmup(server.log)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,342 @@
+# Run with `python load_test.py` to start the app under gunicorn (with
+# gunicorn.conf.py) and replay browser sessions against it for a while,
+# reporting throughput, latency percentiles and worker memory.
+#
+#   python load_test.py --users 8 --duration 300 --workers 2 --threads 4
+#   python load_test.py --save benchmarks/load.json
+#
+# A session opens the page, picks a top tab and one of its subtabs the way
+# the tab callbacks chain (tabs-overall -> subtab -> createTab), and then
+# sweeps the year slider and the age group dropdown of the view it opened.
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from components import VIEWS
+
+# subtabs of each top tab, as the update_tabs callbacks list them
+SUBTABS = {
+    "subtab-registration-numbers": [
+        "tab-overall",
+        "tab-age-group",
+        "tab-abs-districts",
+    ],
+    "subtab-percent-change": ["tab-91-04", "tab-06-22", "tab-districts"],
+}
+
+HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+
+
+class Session:
+    """
+    one simulated user, reusing a single keep-alive connection like a browser
+    """
+
+    def __init__(self, port, dependencies, record, think: float = 0):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.dependencies = dependencies
+        self.record = record
+        self.think = think
+
+    def request(self, name, method, path, body=None):
+        """
+        make a request and record how long it took under name
+        """
+        headers = dict(HEADERS)
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        start = time.perf_counter()
+        # like a browser, retry once on a new connection if the server closed
+        # the one being reused (e.g. when a worker is recycled)
+        for attempt in range(2):
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                content = response.read()
+                ok = response.status < 400
+                break
+            except (OSError, http.client.HTTPException):
+                self.connection.close()
+                content, ok = b"", False
+        self.record(name, time.perf_counter() - start, len(content), ok)
+        if self.think:
+            time.sleep(random.uniform(0, 2 * self.think))
+        return content
+
+    def callback(self, inputId, value, extra=()):
+        """
+        fire every callback that takes inputId as an input, as the browser does
+        when it changes
+        """
+        for dependency in self.dependencies:
+            if dependency.get("clientside_function") or inputId not in [
+                i["id"] for i in dependency["inputs"]
+            ]:
+                continue
+            values = {inputId: value, **dict(extra)}
+            outputId, _, prop = dependency["output"].partition("@")[0].partition(".")
+            self.request(
+                dependency["output"].partition("@")[0],
+                "POST",
+                "/_dash-update-component",
+                {
+                    "output": dependency["output"],
+                    "outputs": {"id": outputId, "property": prop},
+                    "inputs": [
+                        {
+                            "id": i["id"],
+                            "property": i["property"],
+                            "value": values.get(i["id"]),
+                        }
+                        for i in dependency["inputs"]
+                    ],
+                    "changedPropIds": [f"{inputId}.value"],
+                    "state": [],
+                },
+            )
+
+    def run(self):
+        """
+        open the page, a tab and a subtab, then sweep the view's year slider
+        and age group dropdown
+        """
+        self.request("/", "GET", "/")
+        self.request("/_dash-layout", "GET", "/_dash-layout")
+        self.request("/_dash-dependencies", "GET", "/_dash-dependencies")
+        top = random.choice(list(SUBTABS))
+        self.callback("tabs-overall", top)
+        tab = random.choice(SUBTABS[top])
+        self.callback(top, tab)
+
+        view = next(view for view, spec in VIEWS.items() if spec["tab"] == tab)
+        minYear, maxYear = VIEWS[view]["years"]
+        ages = VIEWS[view]["ages"]
+        selected = {f"ages-{view}": ages[0]} if ages else {}
+        for year in range(minYear, maxYear + 1):
+            self.callback(f"year-{view}", year, selected)
+        if ages:
+            year = random.randint(minYear, maxYear)
+            for age in ages:
+                self.callback(f"ages-{view}", age, {f"year-{view}": year})
+        self.connection.close()
+
+
+def freePort():
+    """
+    a port nothing is listening on
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def startServer(port, workers: int, threads: int):
+    """
+    start the app under gunicorn and wait until it answers
+    """
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), THREADS=str(threads))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py"]
+        + ["--bind", f"127.0.0.1:{port}", "app:server"],
+        env=env,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(600):
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/_dash-dependencies")
+            dependencies = json.loads(connection.getresponse().read())
+            # every worker has warmed up once each of them is listed
+            if len(workerPids(server.pid)) >= workers:
+                return server, dependencies
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("the app did not start")
+
+
+def workerPids(master):
+    """
+    pids of the gunicorn workers forked by master
+    """
+    pids = []
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # the command may contain spaces, so split after its ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == master:
+            pids.append(int(pid))
+    return pids
+
+
+def rss(pid):
+    """
+    resident memory of a process in MB, or None if it has exited
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def loadTest(users: int, duration: float, workers: int, threads: int, think: float):
+    """
+    replay sessions from users concurrent users for duration seconds, and
+    sample the workers' memory every second
+    """
+    port = freePort()
+    server, dependencies = startServer(port, workers, threads)
+    requests, lock = [], threading.Lock()
+    samples, sessions = [], [0]
+    stop = time.perf_counter() + duration
+
+    def record(name, seconds, size, ok):
+        with lock:
+            requests.append((time.perf_counter(), name, seconds, size, ok))
+
+    def user():
+        while time.perf_counter() < stop:
+            Session(port, dependencies, record, think).run()
+            with lock:
+                sessions[0] += 1
+
+    def sampleMemory():
+        while time.perf_counter() < stop:
+            memory = {pid: rss(pid) for pid in workerPids(server.pid)}
+            samples.append((time.perf_counter(), memory))
+            time.sleep(1)
+
+    try:
+        start = time.perf_counter()
+        running = [threading.Thread(target=user) for _ in range(users)]
+        running.append(threading.Thread(target=sampleMemory))
+        for thread in running:
+            thread.start()
+        for thread in running:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    return summarize(requests, samples, sessions[0], elapsed, start)
+
+
+def percentiles(seconds):
+    """
+    p50/p95/p99 of latencies, in milliseconds
+    """
+    return {
+        f"p{p}_ms": float(np.percentile(np.array(seconds) * 1000, p))
+        for p in [50, 95, 99]
+    }
+
+
+def summarize(requests, samples, sessions: int, elapsed: float, start: float):
+    """
+    summarize the requests made and memory sampled during a load test
+    """
+    byName = {}
+    for _, name, seconds, size, ok in requests:
+        byName.setdefault(name, []).append((seconds, size, ok))
+    perWorker = [
+        [mb for mb in memory.values() if mb is not None] for _, memory in samples
+    ]
+    totals = [sum(mbs) for mbs in perWorker if mbs]
+    # growth between the first and last tenth of the run, so one sample's
+    # noise (or a worker being recycled) does not dominate
+    tenth = max(len(totals) // 10, 1)
+    return {
+        "duration_s": elapsed,
+        "sessions": sessions,
+        "requests": len(requests),
+        "errors": sum(not ok for *_, ok in requests),
+        "throughput_rps": len(requests) / elapsed,
+        "latency": percentiles([seconds for _, _, seconds, _, _ in requests]),
+        "endpoints": {
+            name: dict(
+                requests=len(results),
+                mean_bytes=float(np.mean([size for _, size, _ in results])),
+                **percentiles([seconds for seconds, _, _ in results]),
+            )
+            for name, results in sorted(byName.items())
+        },
+        "worker_rss_mb": {
+            "max": max((max(mbs) for mbs in perWorker if mbs), default=None),
+            "total_start": float(np.mean(totals[:tenth])) if totals else None,
+            "total_end": float(np.mean(totals[-tenth:])) if totals else None,
+            "timeline": [
+                (round(t - start, 1), {str(pid): mb for pid, mb in memory.items()})
+                for t, memory in samples
+            ],
+        },
+    }
+
+
+def report(results):
+    """
+    print a summary of a load test
+    """
+    print(
+        f"{results['sessions']} sessions, {results['requests']} requests "
+        f"({results['errors']} errors) in {results['duration_s']:.0f}s: "
+        f"{results['throughput_rps']:.1f} requests/s"
+    )
+    latency = results["latency"]
+    print(
+        f"latency p50 {latency['p50_ms']:.1f}ms, p95 {latency['p95_ms']:.1f}ms, "
+        f"p99 {latency['p99_ms']:.1f}ms"
+    )
+    print(f"{'endpoint':<40}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'bytes':>9}")
+    for name, e in results["endpoints"].items():
+        print(
+            f"{name:<40}{e['requests']:>9}{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}"
+            f"{e['mean_bytes']:>9.0f}"
+        )
+    memory = results["worker_rss_mb"]
+    if memory["max"] is not None:
+        print(
+            f"worker RSS: max {memory['max']:.0f}MB per worker; all workers "
+            f"{memory['total_start']:.0f}MB at the start, "
+            f"{memory['total_end']:.0f}MB at the end"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="load test the app locally")
+    parser.add_argument("--users", type=int, default=8, help="concurrent sessions")
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--think", type=float, default=0, help="mean seconds between requests"
+    )
+    parser.add_argument("--save", help="save the results as JSON")
+    args = parser.parse_args()
+
+    results = loadTest(
+        args.users, args.duration, args.workers, args.threads, args.think
+    )
+    report(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,103 @@
+import os
+import time
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from components import VIEWS
+
+# under gunicorn every worker writes its metrics to files here (set by
+# gunicorn.conf.py), and /metrics adds up those of all of them
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+CALLBACK_LATENCY = Histogram(
+    "callback_latency_seconds",
+    "time to run a callback and serialize its response",
+    ["callback", "view"],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+CALLBACK_PAYLOAD = Histogram(
+    "callback_payload_bytes",
+    "size of a callback's serialized response, before compression",
+    ["callback", "view"],
+    buckets=[2**i for i in range(10, 21)],  # 1KB - 1MB
+)
+CALLBACK_ERRORS = Counter(
+    "callback_errors_total", "callbacks that raised an error", ["callback", "view"]
+)
+FIGURE_CACHE = Counter(
+    "figure_cache_lookups_total",
+    "lookups of prerendered figures, by whether one was found (or was stale)",
+    ["view", "result"],
+)
+
+# outputs of each view's callbacks (its choropleth, and the trend of a region
+# clicked on it) and the views they belong to
+OUTPUT_VIEWS = {
+    output: view
+    for view in VIEWS
+    for output in [f"choropleth-{view}.figure", f"drilldown-{view}.children"]
+}
+
+
+def instrumented(f, callback, output):
+    """
+    wrap a Dash callback (as Dash registers it, returning its serialized
+    response) to record its latency, payload size and errors
+    """
+    labels = {"callback": callback, "view": OUTPUT_VIEWS.get(output, "")}
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = f(*args, **kwargs)
+        except PreventUpdate:
+            raise
+        except Exception:
+            CALLBACK_ERRORS.labels(**labels).inc()
+            raise
+        finally:
+            CALLBACK_LATENCY.labels(**labels).observe(time.perf_counter() - start)
+        CALLBACK_PAYLOAD.labels(**labels).observe(len(response.encode("utf-8")))
+        return response
+
+    return wrapper
+
+
+def instrumentCallbacks(app):
+    """
+    instrument every server-side callback registered on a Dash app; call once
+    all of them are registered
+    """
+    for output, callback in app.callback_map.items():
+        if "callback" in callback:
+            # an output set by more than one callback is suffixed with @<hash>;
+            # label those callbacks by their function (e.g. play_06) instead
+            output, duplicate, _ = output.partition("@")
+            f = callback["callback"]
+            callback["callback"] = instrumented(
+                f, f.__name__ if duplicate else output, output
+            )
+
+
+def metricsResponse():
+    """
+    get the metrics of every worker in Prometheus' text format, and its
+    content type
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,27 @@
+# Run with `python prerender.py` to render every choropleth view into
+# ./data/figures/, which the app then serves instead of rebuilding figures.
+
+import app  # registers every prerendered view
+from components import VIEWS
+from figure_cache import RENDERERS, writeFigure, writeStamp
+
+
+def prerender(views=VIEWS):
+    """
+    render every (view, year, age group) combination to gzip'ed JSON, then
+    stamp them with what they were rendered from
+    """
+    for view, spec in views.items():
+        minYear, maxYear = spec["years"]
+        for year in range(minYear, maxYear + 1):
+            if spec["ages"] is None:
+                writeFigure(view, year, None, RENDERERS[view](year))
+            else:
+                for ages in spec["ages"]:
+                    writeFigure(view, year, ages, RENDERERS[view](year, ages))
+        print(f"prerendered {view}")
+    writeStamp()
+
+
+if __name__ == "__main__":
+    prerender()
@@ -0,0 +1,79 @@
+import cProfile
+import glob
+import json
+import os
+import time
+from functools import wraps
+from urllib.parse import quote
+
+# profile the choropleth callbacks and keep the profiles of calls slower than
+# this many milliseconds; unset to not profile at all
+SLOW_MS = (
+    float(os.environ["PROFILE_SLOW_MS"]) if os.environ.get("PROFILE_SLOW_MS") else None
+)
+
+# where profiles are kept, and how many of the latest are
+PROFILE_PATH = os.environ.get("PROFILE_DIR", "./data/profiles/")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 50))
+
+
+def saveProfile(profile, view, args, seconds):
+    """
+    write a profile (readable with pstats or snakeviz) with the inputs of the
+    call next to it, and remove the oldest profiles past PROFILE_KEEP
+    """
+    os.makedirs(PROFILE_PATH, exist_ok=True)
+    year, ages = (list(args) + [None])[:2]
+    name = (
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{view}-{year}"
+        f"-{quote(ages or 'Total', safe='')}-{seconds * 1000:.0f}ms"
+    )
+    profile.dump_stats(os.path.join(PROFILE_PATH, f"{name}.prof"))
+    with open(os.path.join(PROFILE_PATH, f"{name}.json"), "w") as f:
+        json.dump(
+            {"view": view, "year": year, "ages": ages, "ms": seconds * 1000},
+            f,
+            indent=2,
+        )
+
+    profiles = sorted(
+        glob.glob(os.path.join(PROFILE_PATH, "*.prof")), key=os.path.getmtime
+    )
+    for old in profiles[: max(len(profiles) - PROFILE_KEEP, 0)]:
+        for path in [old, f"{old[: -len('.prof')]}.json"]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # another worker got to it first
+                pass
+
+
+def profiledIfSlow(view):
+    """
+    decorator for a figure function taking (year[, ages]); when PROFILE_SLOW_MS
+    is set, every call is profiled and the profile of a slow one is saved.
+    Otherwise the function is left as it is
+    """
+
+    def decorator(f):
+        if SLOW_MS is None:
+            return f
+
+        @wraps(f)
+        def wrapper(*args):
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is running; don't profile
+                return f(*args)
+            try:
+                return f(*args)
+            finally:
+                profile.disable()
+                seconds = time.perf_counter() - start
+                if seconds * 1000 > SLOW_MS:
+                    saveProfile(profile, view, args, seconds)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,125 @@
+import numpy as np
+
+
+class Region:
+    """
+    a state (or half of Pennsylvania) as USA Hockey reports it: its
+    abbreviation, full name, label as the app shows it, the district it
+    belonged to from 1991 to 2005 (None for Pennsylvania, which was split
+    between two) and its code, its position in REGIONS
+    """
+
+    __slots__ = ("abbrev", "name", "label", "district", "code")
+
+    def __init__(self, abbrev, name, district, code):
+        self.abbrev = abbrev
+        self.name = name
+        self.label = f"{name} ({abbrev})"
+        self.district = district
+        self.code = code
+
+    def __repr__(self):
+        return f"Region({self.abbrev!r}, {self.name!r}, {self.district!r})"
+
+
+REGIONS = [
+    Region(abbrev, name, district, code)
+    for code, (abbrev, name, district) in enumerate(
+        [
+            ("AL", "Alabama", "Southeastern"),
+            ("AK", "Alaska", "Pacific"),
+            ("AZ", "Arizona", "Rocky Mountain"),
+            ("AR", "Arkansas", "Southeastern"),
+            ("CA", "California", "Pacific"),
+            ("CO", "Colorado", "Rocky Mountain"),
+            ("CT", "Connecticut", "New England"),
+            ("DC", "Washington, D.C.", "Southeastern"),
+            ("DE", "Delaware", "Atlantic"),
+            ("FL", "Florida", "Southeastern"),
+            ("GA", "Georgia", "Southeastern"),
+            ("HI", "Hawaii", "Pacific"),
+            ("ID", "Idaho", "Rocky Mountain"),
+            ("IL", "Illinois", "Central"),
+            ("IN", "Indiana", "Mid-American"),
+            ("IA", "Iowa", "Central"),
+            ("KS", "Kansas", "Central"),
+            ("KY", "Kentucky", "Mid-American"),
+            ("LA", "Louisiana", "Southeastern"),
+            ("ME", "Maine", "New England"),
+            ("MD", "Maryland", "Southeastern"),
+            ("MA", "Massachusetts", "Massachusetts"),
+            ("MI", "Michigan", "Michigan"),
+            ("MN", "Minnesota", "Minnkota"),
+            ("MS", "Mississippi", "Southeastern"),
+            ("MO", "Missouri", "Central"),
+            ("MT", "Montana", "Rocky Mountain"),
+            ("NE", "Nebraska", "Central"),
+            ("NV", "Nevada", "Pacific"),
+            ("NH", "New Hampshire", "New England"),
+            ("NJ", "New Jersey", "Atlantic"),
+            ("NM", "New Mexico", "Rocky Mountain"),
+            ("NY", "New York", "New York"),
+            ("NC", "North Carolina", "Southeastern"),
+            ("ND", "North Dakota", "Minnkota"),
+            ("OH", "Ohio", "Mid-American"),
+            ("OK", "Oklahoma", "Rocky Mountain"),
+            ("OR", "Oregon", "Pacific"),
+            ("PA", "Pennsylvania", None),
+            ("E PA", "East Pennsylvania", "Atlantic"),
+            ("W PA", "West Pennsylvania", "Mid-American"),
+            ("RI", "Rhode Island", "New England"),
+            ("SC", "South Carolina", "Southeastern"),
+            ("SD", "South Dakota", "Minnkota"),
+            ("TN", "Tennessee", "Southeastern"),
+            ("TX", "Texas", "Rocky Mountain"),
+            ("UT", "Utah", "Rocky Mountain"),
+            ("VT", "Vermont", "New England"),
+            ("VA", "Virginia", "Southeastern"),
+            ("WA", "Washington", "Pacific"),
+            ("WV", "West Virginia", "Mid-American"),
+            ("WI", "Wisconsin", "Central"),
+            ("WY", "Wyoming", "Rocky Mountain"),
+        ]
+    )
+]
+
+BY_ABBREV = {region.abbrev: region for region in REGIONS}
+
+# the same, as arrays indexed by code, so mapping many abbreviations at once
+# is a gather rather than a lookup per abbreviation
+ABBREVS = np.array([region.abbrev for region in REGIONS], dtype="object")
+LABELS = np.array([region.label for region in REGIONS], dtype="object")
+DISTRICTS = np.array([region.district for region in REGIONS], dtype="object")
+# abbreviations sorted, and their codes, for binary searching
+SORTED = np.argsort(ABBREVS)
+
+
+def regionCodes(abbrevs):
+    """
+    get the codes of an array(-like) of abbreviations, -1 for any that are not
+    a region
+    """
+    abbrevs = np.asarray(abbrevs, dtype="object")
+    positions = np.searchsorted(ABBREVS[SORTED], abbrevs).clip(0, len(REGIONS) - 1)
+    codes = SORTED[positions]
+    return np.where(ABBREVS[codes] == abbrevs, codes, -1)
+
+
+def regionLabels(abbrevs):
+    """
+    get the labels of an array(-like) of abbreviations, e.g. "Minnesota (MN)";
+    raises a KeyError for any that is not a region
+    """
+    codes = regionCodes(abbrevs)
+    if (codes < 0).any():
+        raise KeyError(np.asarray(abbrevs, dtype="object")[codes < 0][0])
+    return LABELS[codes]
+
+
+def earlyDistricts(abbrevs):
+    """
+    get the 1991-2005 districts of an array(-like) of abbreviations, None for
+    Pennsylvania and any that is not a region
+    """
+    codes = regionCodes(abbrevs)
+    return np.where(codes >= 0, DISTRICTS[codes], None)
@@ -0,0 +1,121 @@
+import json
+import threading
+import numpy as np
+
+from regions import regionLabels
+
+
+class Registrations:
+    """
+    registrations of states or districts (and their change from the year
+    before) as dense year x region x age group arrays, memory-mapped from the
+    Arrow file written by the data pipeline (see registrations_to_arrow in
+    source/extract_tables.py); those raw cubes (value, pct and absChange) are
+    read in place, so they are shared between workers through the page cache
+
+    every year also gets its regions in their original order, and compact
+    region x age group arrays of just those regions, so a year/age group is a
+    view into an existing array rather than a newly filtered frame. Those
+    per-year arrays (values, changes, mappedValues and mappedChanges) are
+    copies made once on load, not views of the file; workers only share them
+    when the app is loaded before forking (preload_app in gunicorn.conf.py)
+    """
+
+    def __init__(self, path, labels=None):
+        import pyarrow as pa  # only needed once data is first loaded
+
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        self.region = table.schema.names[1]
+        self.ages = {
+            ages: i for i, ages in enumerate(json.loads(table.schema.metadata[b"ages"]))
+        }
+        year = table.column("Year").to_numpy()
+        self.minYear = int(year[0])
+        self.years = np.arange(self.minYear, int(year[-1]) + 1)
+        regions = len(table) // len(self.years)
+        self.regions = np.array(table.column(self.region)[:regions].to_pylist())
+        # every region's column in the arrays, so its series over the years
+        # is a view into them rather than a search
+        self.regionIndex = {region: i for i, region in enumerate(self.regions)}
+        # how regions are labeled (labels maps an array of them), if not as
+        # themselves
+        self.regionLabels = self.regions if labels is None else labels(self.regions)
+        shape = (len(self.years), len(self.regions), len(self.ages))
+
+        def cube(name):
+            # the flattened list values are the cube itself; no copy is made
+            values = table.column(name).chunk(0).values
+            return values.to_numpy(zero_copy_only=True).reshape(shape)
+
+        self.value = cube("value")
+        self.pct = cube("pct")
+        self.absChange = cube("absChange")
+
+        # regions reported each year, in the order of the original tables
+        order = table.column("Order").to_numpy().reshape(shape[:2])
+        self.rows = [
+            np.flatnonzero(o >= 0)[np.argsort(o[o >= 0], kind="stable")] for o in order
+        ]
+        self.locations = [list(self.regions[rows]) for rows in self.rows]
+        self.labels = [list(self.regionLabels[rows]) for rows in self.rows]
+
+        def byYear(cube):
+            return [cube[i, rows] for i, rows in enumerate(self.rows)]
+
+        self.values = byYear(self.value)
+        self.changes = byYear(self.absChange)
+        # what the map draws: no data as no change, infinite growth capped
+        self.mappedValues = byYear(np.nan_to_num(self.value, nan=0))
+        self.mappedChanges = byYear(
+            np.nan_to_num(self.pct, nan=0, posinf=99999.99, neginf=-np.inf)
+        )
+
+        # national totals and their change from the year before
+        self.totals = np.nansum(self.value, axis=1).astype("int64")
+        self.overallChange = np.full(self.totals.shape, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.overallChange[1:] = (
+                (self.totals[1:] - self.totals[:-1]) / self.totals[:-1] * 100
+            )
+
+    def index(self, year, ages="Total"):
+        """
+        get the indices of a year and age group; raises a KeyError for either
+        not being in the data (rather than a year before the first wrapping
+        around to the end of the arrays)
+        """
+        if not self.minYear <= year <= self.years[-1]:
+            raise KeyError(year)
+        return year - self.minYear, self.ages[ages]
+
+    def series(self, region):
+        """
+        get the registrations of a region in every year as a year x age group
+        array, or None if it is not in the data
+        """
+        i = self.regionIndex.get(region)
+        return None if i is None else self.value[:, i]
+
+
+##### Registration data
+# level -> arguments of its Registrations; each is only loaded on first use
+SOURCES = {
+    "state": ("./data/states.arrow", regionLabels),
+    "district": ("./data/districts.arrow",),
+}
+
+LOADED = {}
+LOCK = threading.Lock()
+
+
+def getRegistrations(level):
+    """
+    get the registrations of a level ("state" or "district"), loading them
+    the first time they are asked for; threads asking at the same time wait
+    for a single load
+    """
+    if level not in LOADED:
+        with LOCK:
+            if level not in LOADED:
+                LOADED[level] = Registrations(*SOURCES[level])
+    return LOADED[level]
@@ -1,14 +1,25 @@
 # coding=utf-8
 import tabula
 import re
+import os
+import json
+import shutil
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from typing import List
 from tqdm import tqdm
 from functools import reduce
-import locale
+import sys
 
-locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
+# the region registry is shared with the app, at the root of the repo
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import regions
+from regions import earlyDistricts
 
 # list of csv names and which page to extract a table from
 DATA = [
@@ -35,6 +46,18 @@ DATA = [
     {"name": "22-23", "page": "7"},
 ]
 
+# number of processes seasons are extracted/cleaned in; defaults to one per core
+WORKERS = int(os.environ["WORKERS"]) if os.environ.get("WORKERS") else None
+
+# record of what the last run read and wrote; see Manifest
+MANIFEST_PATH = "./data/manifest.json"
+
+# final tables and where the app reads them from
+PUBLISHED = {
+    "./data/arrow/states.arrow": "../data/states.arrow",
+    "./data/arrow/districts.arrow": "../data/districts.arrow",
+}
+
 DATA_COLUMNS = [
     "20&Over",
     "19",
@@ -47,21 +70,66 @@ DATA_COLUMNS = [
     "6&U",
 ]
 
+# age groups as the app lists them
+AGE_GROUPS = ["Total"] + DATA_COLUMNS
+
+
+# dash variants the PDFs print (for "none", or in place of a minus sign)
+DASHES = "[\u2010\u2011\u2012\u2013\u2014\u2212]"
+
 
 ## helper functions
+def parseNumbers(df):
+    """
+    parse a frame of numbers as printed in the PDFs (comma'ed, with "-" or any
+    other dash for none) into nullable integers, in one pass over all of its
+    cells at once; blank cells are <NA>, and whole numbers read as floats are
+    accepted. Raises a ValueError listing every cell that is not a number
+    """
+    cells = df.astype("string").to_numpy(dtype="object", na_value=None)
+    text = pc.utf8_trim_whitespace(pa.array(cells.ravel(order="F"), pa.string()))
+    text = pc.replace_substring(pc.replace_substring_regex(text, DASHES, "-"), ",", "")
+    text = pc.if_else(pc.equal(text, "-"), "0", text)
+    # read_csv reads a column with a blank cell as floats, so 1 comes as "1.0"
+    text = pc.replace_substring_regex(text, r"^(-?\d+)\.0+$", r"\1")
+    valid = pc.fill_null(pc.match_substring_regex(text, r"^-?\d+$"), True)
+    invalid = ~valid.to_numpy(zero_copy_only=False).reshape(df.shape, order="F")
+    if invalid.any():
+        rows, columns = np.nonzero(invalid)
+        raise ValueError(
+            "cells that are not numbers: "
+            + ", ".join(
+                f"{df.index[i]!r}/{df.columns[j]!r}: {cells[i, j]!r}"
+                for i, j in zip(rows, columns)
+            )
+        )
+    numbers = pc.cast(text, pa.int64())
+    missing = numbers.is_null().to_numpy(zero_copy_only=False)
+    values = numbers.fill_null(0).to_numpy()
+    return pd.DataFrame(
+        {
+            column: pd.arrays.IntegerArray(
+                values[i * len(df) : (i + 1) * len(df)],
+                missing[i * len(df) : (i + 1) * len(df)],
+            )
+            for i, column in enumerate(df.columns)
+        },
+        index=df.index,
+    )
+
+
 def setTypes(df, stringColumns: List[str]):
     """
-    fix any comma'ed numbers and set all numerical columns to int64 type,
-    and all designated stringColumns to string type
+    parse all numerical columns into nullable integers (see parseNumbers),
+    and set all designated stringColumns to string type
     """
-    return pd.merge(
-        df[stringColumns],
-        df.drop(columns=stringColumns)
-        .astype("str")  # prevent errors with 0 being autocast to int
-        .map(locale.atoi),  # comma'ed numbers
-        left_index=True,
-        right_index=True,
-    ).astype(flattenDictionary([{c: pd.StringDtype()} for c in stringColumns]))
+    return pd.concat(
+        [
+            df[stringColumns].astype(pd.StringDtype()),
+            parseNumbers(df.drop(columns=stringColumns)),
+        ],
+        axis=1,
+    )
 
 
 def flattenDictionary(d: List[dict]):
@@ -76,63 +144,71 @@ def flattenDictionary(d: List[dict]):
     return reduce(f, d)
 
 
-def stateToDistrict(state):
-    """
-    returns the 1991-2005 district for a state
-    """
-    if state in ["DE", "E PA", "NJ"]:
-        return "Atlantic"
-    elif state in ["IL", "IA", "KS", "MO", "NE", "WI"]:
-        return "Central"
-    elif state == "MA":
-        return "Massachusetts"
-    elif state == "MI":
-        return "Michigan"
-    elif state in ["IN", "KY", "OH", "W PA", "WV"]:
-        return "Mid-American"
-    elif state in ["MN", "ND", "SD"]:
-        return "Minnkota"
-    elif state in ["CT", "ME", "NH", "RI", "VT"]:
-        return "New England"
-    elif state == "NY":
-        return "New York"
-    elif state in ["AK", "CA", "HI", "NV", "OR", "WA"]:
-        return "Pacific"
-    elif state in ["AZ", "CO", "ID", "MT", "NM", "OK", "TX", "UT", "WY"]:
-        return "Rocky Mountain"
-    elif state in [
-        "AL",
-        "AR",
-        "DC",
-        "FL",
-        "GA",
-        "LA",
-        "MD",
-        "MS",
-        "NC",
-        "SC",
-        "TN",
-        "VA",
-    ]:
-        return "Southeastern"
+# processing functions
 
 
-# processing functions
+class SeasonError(Exception):
+    """
+    raised once every season of a stage has run, if any of them failed;
+    errors maps the name of each season that failed to its exception
+    """
+
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__(
+            "failed seasons: "
+            + "; ".join(f"{name}: {error!r}" for name, error in errors.items())
+        )
+
+
+def forEachSeason(f, seasons: dict, workers: int = WORKERS):
+    """
+    call f(*args) for every season (name -> args) across a pool of processes,
+    collecting results in the order of seasons; a failing season does not stop
+    the others, but they are all reported in one SeasonError at the end
+    """
+    results, errors = {}, {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(f, *args) for name, args in seasons.items()}
+        for name, future in tqdm(futures.items()):
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+    if errors:
+        raise SeasonError(errors)
+    return results
+
+
+def table_to_csv(
+    year, import_path: str = "./data/pdfs/", export_path: str = "./data/csvs/raw/"
+):
+    """
+    extract a table from a PDF and convert it into a CSV
+    """
+    tabula.convert_into(
+        f"{import_path}{year['name']}.pdf",
+        f"{export_path}{year['name']}.csv",
+        output_format="csv",
+        pages=year["page"],
+    )
 
 
 def tables_to_csvs(
-    data: List, import_path: str = "./data/pdfs/", export_path: str = "./data/csvs/raw/"
+    data: List,
+    import_path: str = "./data/pdfs/",
+    export_path: str = "./data/csvs/raw/",
+    workers: int = WORKERS,
 ):
     """
-    extract tables from PDFs and convert into CSVs
+    extract tables from PDFs and convert into CSVs, one process per season
+    (each of which starts its own JVM)
     """
-    for year in tqdm(data):
-        tabula.convert_into(
-            f"{import_path}{year['name']}.pdf",
-            f"{export_path}{year['name']}.csv",
-            output_format="csv",
-            pages=year["page"],
-        )
+    forEachSeason(
+        table_to_csv,
+        {year["name"]: (year, import_path, export_path) for year in data},
+        workers,
+    )
 
 
 def clean_csv(
@@ -220,7 +296,7 @@ def clean_csv(
                 .replace(b"\xe2\x80\x90", b"-")
                 .decode("utf-8")
             )
-            df = setTypes(df.replace("-", "0"), ["District", "State"])
+            df = setTypes(df, ["District", "State"])
         elif name in ["21-22", "22-23"]:
             df = df.applymap(
                 lambda x: str(x)
@@ -243,7 +319,7 @@ def clean_csv(
             df[DATA_COLUMNS] = df[DATA_COLUMNS].applymap(
                 lambda x: str(x).replace("", "")
             )
-            df = setTypes(df.replace("-", "0"), ["District", "State"])
+            df = setTypes(df, ["District", "State"])
     elif name == "05-06":
         df1 = (
             pd.read_csv(f"{import_path}{name}.csv", dtype="object", nrows=20)
@@ -331,24 +407,26 @@ def clean_csv(
             "WY",
         ]
         df = pd.concat([df1, df2]).reset_index(drop=True)
-        df["District"] = df["State"].apply(stateToDistrict)
+        df["District"] = earlyDistricts(df["State"])
         df = setTypes(df, ["District", "State"])
     df.to_csv(f"{export_path}{name}.csv", index=False)
 
 
-def clean_csvs(data):
+def clean_csvs(data, workers: int = WORKERS):
     """
-    clean all csvs
+    clean all csvs, one process per season
     """
-    for year in tqdm(data):
-        clean_csv(year["name"])
+    forEachSeason(clean_csv, {year["name"]: (year["name"],) for year in data}, workers)
 
 
-def combine_table(full_df, name, import_path: str = "data/csvs/cleaned/"):
+def read_table(name, import_path: str = "data/csvs/cleaned/"):
     """
-    merge two yearly tables into one table
+    read a cleaned yearly table, shaped to be combined with the others
     """
-    df = pd.read_csv(f"{import_path}{name}.csv")
+    df = pd.read_csv(
+        f"{import_path}{name}.csv",
+        dtype={"District": "object", "State": "object"},
+    )
     if name in [
         "08-09",
         "09-10",
@@ -370,7 +448,7 @@ def combine_table(full_df, name, import_path: str = "data/csvs/cleaned/"):
         df = df.iloc[:-1]
 
     df.insert(0, "Year", "20" + name[:2])
-    return pd.concat([full_df, df])
+    return df.astype({c: "int64" for c in ["Total"] + DATA_COLUMNS})
 
 
 def combine_tables(
@@ -389,29 +467,26 @@ def combine_tables(
         lambda x: "20" + x[:2] if x[0] == "0" else "19" + x[:2]
     )
     # lack of PA split in data pre '05 makes districts hard to parse
-    # full_df.insert(0, "District", full_df["State"].apply(stateToDistrict))
+    # full_df.insert(0, "District", earlyDistricts(full_df["State"]))
     full_df.insert(0, "District", pd.NA)
 
     full_df.insert(0, "Year", full_df.pop("Year"))
-    df_cols = pd.DataFrame(
-        [[pd.NA] * 9] * full_df.shape[0],
-        columns=[
-            "20&Over",
-            "19",
-            "17-18",
-            "15-16",
-            "13-14",
-            "11-12",
-            "9-10",
-            "7-8",
-            "6&U",
-        ],
+    # no age groups before 05-06
+    for column in DATA_COLUMNS:
+        full_df[column] = pd.Series(pd.NA, index=full_df.index, dtype="object")
+
+    # read every yearly table and concatenate them all at once, rather than
+    # copying the growing table once per year
+    full_df = pd.concat(
+        [full_df]
+        + [
+            read_table(file["name"], import_path)
+            for file in tqdm(data)
+            if file["name"] not in ["02-03", "03-04", "04-05"]
+        ]
     )
-    full_df = pd.concat([full_df, df_cols], axis=1)
-
-    for file in tqdm(data):
-        if file["name"] not in ["02-03", "03-04", "04-05"]:
-            full_df = combine_table(full_df, file["name"])
+    # concat turns the all-NA pre-05 districts into NaN; keep them NA
+    full_df["District"] = full_df["District"].mask(full_df["District"].isna(), pd.NA)
     full_df = full_df.sort_values(["Year", "District"]).reset_index(drop=True)
     full_df.to_csv(export_path, index=False)
     full_df.to_pickle("./data/pkls/girls-women-by-district-by-state.pkl")
@@ -433,11 +508,11 @@ def state_change_tables():
         years = name[-5:]
         if years == "91-04":
             df = full_df[(full_df.Year.apply(int) < 2005) & (full_df.Year != "1990")]
+            df = change(df, full_df, "State", ["Total"], bool)
+            df = df[["Year", "State", "Total"]]
         elif years == "06-22":
             df = full_df[full_df.Year.apply(int) >= 2006]
-        df = df.apply(change, args=(years, bool, full_df, "State"), axis="columns")
-        if years == "91-04":
-            df = df[["Year", "State", "Total"]]
+            df = change(df, full_df, "State", ["Total"] + DATA_COLUMNS, bool)
         df.to_csv(f"./data/csvs/merged/{name}.csv", index=False)
         df.to_pickle(f"./data/pkls/{name}.pkl")
 
@@ -461,8 +536,12 @@ def district_tables():
         ("abs_change_districts", False),
     ]
     for name, bool in l:
-        df = new_dist_df[new_dist_df.Year.astype("int") >= 2008].apply(
-            change, args=("districts", bool, new_dist_df, "District"), axis="columns"
+        df = change(
+            new_dist_df[new_dist_df.Year.astype("int") >= 2008],
+            new_dist_df,
+            "District",
+            ["Total"] + DATA_COLUMNS,
+            bool,
         )
         df.to_csv(f"./data/csvs/merged/{name}.csv", index=False)
         df.to_pickle(f"./data/pkls/{name}.pkl")
@@ -470,47 +549,369 @@ def district_tables():
     new_dist_df.to_pickle("./data/pkls/girls-women-by-district.pkl")
 
 
+def arrow_tables():
+    """
+    write the state and district tables the app reads
+    """
+
+    def read(name):
+        return pd.read_pickle(f"./data/pkls/{name}.pkl")
+
+    os.makedirs("./data/arrow", exist_ok=True)
+    registrations_to_arrow(
+        read("girls-women-by-district-by-state"),
+        pd.concat([read("pct_change_91-04"), read("pct_change_06-22")]),
+        pd.concat([read("abs_change_91-04"), read("abs_change_06-22")]),
+        "State",
+        "./data/arrow/states.arrow",
+    )
+    registrations_to_arrow(
+        read("girls-women-by-district"),
+        read("pct_change_districts"),
+        read("abs_change_districts"),
+        "District",
+        "./data/arrow/districts.arrow",
+    )
+
+
+def registrations_to_arrow(value, pct, absChange, region: str, export_path: str):
+    """
+    write registrations and their change from the year before as an
+    uncompressed Arrow file with a row for every year and region (both
+    sorted), and one fixed size list of age groups per row for each of
+    value/pct/absChange, with NaN wherever there is no data; each of those
+    columns is a contiguous year x region x age group array the app can
+    memory-map and use in place. Order is a region's position among its
+    year's rows in the original table, or -1 if it was not reported
+    """
+    years = np.arange(
+        value.Year.astype("int").min(), value.Year.astype("int").max() + 1
+    )
+    regions = np.array(sorted(value[region].unique()))
+
+    def rows(df):
+        return (df.Year.astype("int").to_numpy() - years[0]) * len(regions) + (
+            np.searchsorted(regions, df[region].to_numpy())
+        )
+
+    def ageGroups(df):
+        flat = np.full((len(years) * len(regions), len(AGE_GROUPS)), np.nan)
+        flat[rows(df)] = (
+            df.reindex(columns=AGE_GROUPS)
+            .astype("Float64")
+            .to_numpy(dtype="float64", na_value=np.nan)
+        )
+        return pa.FixedSizeListArray.from_arrays(flat.ravel(), len(AGE_GROUPS))
+
+    order = np.full(len(years) * len(regions), -1, dtype="int32")
+    order[rows(value)] = value.groupby("Year", sort=False).cumcount().to_numpy()
+    table = pa.table(
+        {
+            "Year": np.repeat(years, len(regions)).astype("int16"),
+            region: np.tile(regions, len(years)),
+            "Order": order,
+            "value": ageGroups(value),
+            "pct": ageGroups(pct),
+            "absChange": ageGroups(absChange),
+        },
+        metadata={"ages": json.dumps(AGE_GROUPS)},
+    )
+    with pa.OSFile(export_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
 def change(
-    row,
-    years,
-    percentBool,
+    df,
     full_df,
     groupCol,
+    columns: List[str],
+    percentBool,
 ):
     """
-    helper function for calculating the change between two years
+    calculate the change in columns between each row's year and the previous
+    year for the same groupCol; rows without a previous year get NaN, and
+    percent changes from 0 are inf (or NaN for 0 to 0), except in object
+    columns (the age groups of the state table), where dividing Python ints
+    by 0 has always given NaN
+    """
+
+    def toFloat(frame):
+        return (
+            frame[columns].astype("Float64").to_numpy(dtype="float64", na_value=np.nan)
+        )
+
+    # line each row up with the row for the same group in the previous year
+    prevYear = full_df.assign(Year=(full_df.Year.astype("int") + 1).astype("str"))
+    prevYear = prevYear.set_index(["Year", groupCol]).reindex(
+        pd.MultiIndex.from_frame(df[["Year", groupCol]])
+    )
+    current, previous = toFloat(df), toFloat(prevYear)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if percentBool:
+            values = (current - previous) / previous * 100
+        else:
+            values = current - previous
+
+    df = df.copy()
+    for i, column in enumerate(columns):
+        if percentBool and full_df[column].dtype == "object":
+            values[previous[:, i] == 0, i] = np.nan
+        # absolute changes stay whole numbers when nothing is missing
+        if percentBool or np.isnan(values[:, i]).any():
+            df[column] = values[:, i]
+        else:
+            df[column] = values[:, i].astype("int64")
+    return df
+
+
+def publish(published: dict = PUBLISHED):
+    """
+    copy the final tables to where the app reads them; every file is fully
+    written next to its destination first and then swapped in with an atomic
+    rename, so the app never sees a partially written table
+    """
+    for src, dst in published.items():
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        with open(src, "rb") as fsrc, open(f"{dst}.tmp", "wb") as fdst:
+            shutil.copyfileobj(fsrc, fdst)
+            fdst.flush()
+            os.fsync(fdst.fileno())
+    for dst in published.values():
+        os.replace(f"{dst}.tmp", dst)
+
+
+# incremental runs
+
+
+def fileHash(path: str):
+    """
+    sha256 of a file's contents, or None if it does not exist
+    """
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def codeHash(*code):
+    """
+    sha256 of the source of the functions (or modules) a stage runs, and of the
+    repr of any constants it reads
+    """
+    h = hashlib.sha256()
+    for c in code:
+        h.update(
+            (
+                inspect.getsource(c) if callable(c) or inspect.ismodule(c) else repr(c)
+            ).encode("utf-8")
+        )
+    return h.hexdigest()
+
+
+class Manifest:
+    """
+    hashes of the inputs and outputs of every stage of the last run, so a run
+    only redoes stages whose inputs (or the code they run) changed, or whose
+    outputs went missing or were modified since. A stage's code is only what
+    it runs (see codeHash), not this whole file, so adding a season to DATA
+    leaves the other seasons up to date
     """
-    newRow = row
-    prevYearRow = full_df[
-        (full_df.Year == str(int(row.Year) - 1)) & (full_df[groupCol] == row[groupCol])
-    ].squeeze()
 
-    def calculateChange(newRow, column):
+    def __init__(self, path: str = MANIFEST_PATH):
+        self.path = path
         try:
-            if percentBool:
-                newRow[column] = (
-                    (row[column] - prevYearRow[column]) / prevYearRow[column]
-                ) * 100
-            else:
-                newRow[column] = row[column] - prevYearRow[column]
-        except:
-            newRow[column] = np.nan
-        return newRow
-
-    newRow = calculateChange(newRow, "Total")
-    if years == "06-22":
-        for column in row.index[4:]:
-            newRow = calculateChange(newRow, column)
-    elif years == "districts":
-        for column in row.index[3:]:
-            newRow = calculateChange(newRow, column)
-    return newRow
+            with open(path) as f:
+                self.stages = json.load(f)
+        except FileNotFoundError:
+            self.stages = {}
+
+    def check(
+        self, stage: str, inputs: List[str], outputs: List[str], args=(), code=()
+    ):
+        """
+        get what a stage would now be run with, or None if its last run with
+        the same code, arguments and inputs wrote all of outputs, and they are
+        still as it left them
+        """
+        record = {
+            "code": codeHash(*code),
+            "args": json.dumps(args, sort_keys=True),
+            "inputs": {path: fileHash(path) for path in inputs},
+        }
+        last = self.stages.get(stage)
+        if (
+            last is not None
+            and {k: last[k] for k in record} == record
+            and set(last["outputs"]) == set(outputs)
+            and all(
+                h is not None and fileHash(path) == h
+                for path, h in last["outputs"].items()
+            )
+        ):
+            return None
+        return record
+
+    def record(self, stage: str, record: dict, outputs: List[str]):
+        """
+        save that a stage ran with record and wrote outputs
+        """
+        self.stages[stage] = dict(
+            record, outputs={path: fileHash(path) for path in outputs}
+        )
+        self.save()
+
+    def run(self, stage: str, inputs: List[str], outputs: List[str], f, *args, code=()):
+        """
+        run f(*args) for a stage unless its last run is still up to date; code
+        is any helpers and constants f uses besides itself. Returns whether it
+        ran
+        """
+        record = self.check(stage, inputs, outputs, args, (f,) + tuple(code))
+        if record is None:
+            return False
+        f(*args)
+        self.record(stage, record, outputs)
+        return True
+
+    def runSeasons(
+        self, stage: str, f, data, inputs, outputs, workers: int = WORKERS, code=()
+    ):
+        """
+        run f(seasons, workers=workers) for a per-season stage with only the
+        seasons that are not up to date; inputs and outputs give the path of a
+        season's input and output, and code is as for run. Seasons that succeed
+        are recorded even if others fail
+        """
+        stale = {}
+        for year in data:
+            record = self.check(
+                f"{stage} {year['name']}",
+                [inputs(year)],
+                [outputs(year)],
+                [year],
+                (f,) + tuple(code),
+            )
+            if record is not None:
+                stale[year["name"]] = (year, record)
+        if not stale:
+            return
+        failed = {}
+        try:
+            f([year for year, _ in stale.values()], workers=workers)
+        except SeasonError as e:
+            failed = e.errors
+        for name, (year, record) in stale.items():
+            if name not in failed:
+                self.record(f"{stage} {name}", record, [outputs(year)])
+        if failed:
+            raise SeasonError(failed)
+
+    def save(self):
+        """
+        atomically write the manifest
+        """
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump(self.stages, f, indent=2, sort_keys=True)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+def build(data, manifest_path: str = MANIFEST_PATH, workers: int = WORKERS):
+    """
+    run the entire data process, only redoing the stages whose inputs changed,
+    and publish the final tables to the app
+    """
+    manifest = Manifest(manifest_path)
+    # PDFs are not kept in the repo; without one, the raw csv is the input
+    manifest.runSeasons(
+        "extract",
+        tables_to_csvs,
+        [year for year in data if os.path.exists(f"./data/pdfs/{year['name']}.pdf")],
+        inputs=lambda year: f"./data/pdfs/{year['name']}.pdf",
+        outputs=lambda year: f"./data/csvs/raw/{year['name']}.csv",
+        workers=workers,
+        code=[table_to_csv],
+    )
+    manifest.runSeasons(
+        "clean",
+        clean_csvs,
+        data,
+        inputs=lambda year: f"./data/csvs/raw/{year['name']}.csv",
+        outputs=lambda year: f"./data/csvs/cleaned/{year['name']}.csv",
+        workers=workers,
+        code=[
+            clean_csv,
+            setTypes,
+            parseNumbers,
+            flattenDictionary,
+            DASHES,
+            DATA_COLUMNS,
+            regions,
+        ],
+    )
+    merged = "./data/pkls/girls-women-by-district-by-state.pkl"
+    manifest.run(
+        "combine",
+        [f"./data/csvs/cleaned/{year['name']}.csv" for year in data],
+        ["./data/csvs/merged/girls-women-by-district-by-state.csv", merged],
+        combine_tables,
+        data,
+        code=[read_table, DATA_COLUMNS],
+    )
+    manifest.run(
+        "state change",
+        [merged],
+        [
+            path
+            for name in [
+                "pct_change_91-04",
+                "abs_change_91-04",
+                "pct_change_06-22",
+                "abs_change_06-22",
+            ]
+            for path in [f"./data/csvs/merged/{name}.csv", f"./data/pkls/{name}.pkl"]
+        ],
+        state_change_tables,
+        code=[change, DATA_COLUMNS],
+    )
+    manifest.run(
+        "district",
+        [merged],
+        [
+            path
+            for name in [
+                "pct_change_districts",
+                "abs_change_districts",
+                "girls-women-by-district",
+            ]
+            for path in [f"./data/csvs/merged/{name}.csv", f"./data/pkls/{name}.pkl"]
+        ],
+        district_tables,
+        code=[change, DATA_COLUMNS],
+    )
+    manifest.run(
+        "arrow",
+        [merged]
+        + [
+            f"./data/pkls/{name}.pkl"
+            for name in [
+                "pct_change_91-04",
+                "abs_change_91-04",
+                "pct_change_06-22",
+                "abs_change_06-22",
+                "pct_change_districts",
+                "abs_change_districts",
+                "girls-women-by-district",
+            ]
+        ],
+        list(PUBLISHED),
+        arrow_tables,
+        code=[registrations_to_arrow, AGE_GROUPS],
+    )
+    manifest.run("publish", list(PUBLISHED), list(PUBLISHED.values()), publish)
 
 
 # run entire data process
 if __name__ == "__main__":
-    # tables_to_csvs(DATA)
-    clean_csvs(DATA)
-    combine_tables(DATA)
-    state_change_tables()
-    district_tables()
+    build(DATA)
@@ -0,0 +1,329 @@
+# coding=utf-8
+import json
+from typing import Dict, List
+
+# name of each simplified geometry and the geojson it is built from
+GEOJSONS = [
+    {"name": "states", "file": "states"},
+    {"name": "districts", "file": "districts07-20"},
+]
+
+# maximum distance (in degrees) a simplified border may stray from the
+# original; at scope="usa" a pixel is roughly 0.05 degrees
+LEVELS = {
+    "high": 0.002,
+    "medium": 0.01,
+    "low": 0.03,
+}
+
+# decimals kept for coordinates (~1m)
+PRECISION = 5
+
+# TopoJSON points are snapped to a grid this many steps across the whole
+# geometry; across the USA (Alaska's islands past 180 degrees included) a
+# step is at most 0.0036 degrees, well under a pixel
+QUANTIZATION = 100000
+
+
+## helper functions
+def quantize(ring, precision: int = PRECISION):
+    """
+    round the coordinates of a ring, dropping any repeated points
+    """
+    points = []
+    for x, y in ring:
+        point = (round(x, precision), round(y, precision))
+        if not points or point != points[-1]:
+            points.append(point)
+    if points[0] != points[-1]:
+        points.append(points[0])
+    return points
+
+
+def polygons(feature):
+    """
+    get the polygons of a (Multi)Polygon feature
+    """
+    geometry = feature["geometry"]
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+
+def findJunctions(rings: List[list]):
+    """
+    find every point where a border stops being shared by the same features,
+    i.e. where a point is reached from different neighboring points
+    """
+    neighbors = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring) - 1  # last point repeats the first
+        for i in range(n):
+            pair = frozenset((ring[i - 1 if i else n - 1], ring[(i + 1) % n]))
+            if neighbors.setdefault(ring[i], pair) != pair:
+                junctions.add(ring[i])
+    return junctions
+
+
+def splitRing(ring, junctions):
+    """
+    cut a ring into arcs running between junctions; a ring without any
+    junctions becomes a single closed arc starting at its smallest point
+    """
+    points = ring[:-1]
+    cuts = [i for i, point in enumerate(points) if point in junctions]
+    if not cuts:
+        start = points.index(min(points))
+        points = points[start:] + points[:start]
+        return [points + [points[0]]]
+    points = points[cuts[0] :] + points[: cuts[0]]
+    cuts = [i - cuts[0] for i in cuts] + [len(points)]
+    points.append(points[0])
+    return [points[start : end + 1] for start, end in zip(cuts, cuts[1:])]
+
+
+def extractArcs(geojson):
+    """
+    split every ring of a geojson into arcs shared between neighbors
+
+    returns the unique arcs and, for each feature, its polygons as lists of
+    rings, where each ring is a list of arc indices (~i for a reversed arc)
+    """
+    features = [
+        [
+            [ring for ring in map(quantize, polygon) if len(ring) >= 4]
+            for polygon in polygons(feature)
+            if len(quantize(polygon[0])) >= 4  # skip specks smaller than ~1m
+        ]
+        for feature in geojson["features"]
+    ]
+    junctions = findJunctions(
+        [ring for feature in features for polygon in feature for ring in polygon]
+    )
+    arcs = []
+    index = {}
+
+    def arcIndex(arc):
+        key = tuple(arc)
+        if key not in index:
+            reverse = tuple(reversed(arc))
+            if reverse in index:
+                return ~index[reverse]
+            index[key] = len(arcs)
+            arcs.append(arc)
+        return index[key]
+
+    topology = [
+        [
+            [[arcIndex(arc) for arc in splitRing(ring, junctions)] for ring in polygon]
+            for polygon in feature
+        ]
+        for feature in features
+    ]
+    return arcs, topology
+
+
+def simplifyArc(arc, tolerance: float):
+    """
+    Douglas-Peucker simplification of an arc, always keeping its endpoints
+    """
+    keep = [False] * len(arc)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(arc) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = arc[first], arc[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = (dx * dx + dy * dy) ** 0.5
+        maxDistance, maxIndex = 0, None
+        for i in range(first + 1, last):
+            x, y = arc[i]
+            if length:
+                distance = abs(dy * x - dx * y + x2 * y1 - y2 * x1) / length
+            else:  # closed arc; measure from its start
+                distance = ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5
+            if distance > maxDistance:
+                maxDistance, maxIndex = distance, i
+        if maxIndex is not None and maxDistance > tolerance:
+            keep[maxIndex] = True
+            stack += [(first, maxIndex), (maxIndex, last)]
+    return [point for point, k in zip(arc, keep) if k]
+
+
+def ringArea(ring):
+    """
+    signed (shoelace) area of a ring
+    """
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:])) / 2
+
+
+def buildRing(arcs, ring):
+    """
+    stitch a ring back together from its arc indices
+    """
+    points = []
+    for i in ring:
+        arc = arcs[i] if i >= 0 else list(reversed(arcs[~i]))
+        points += arc if not points else arc[1:]
+    return points
+
+
+def simplifyArcs(geojson, tolerance: float):
+    """
+    simplify every shared border of a geojson once, so both sides reuse it
+
+    returns the simplified arcs and, for each feature, its polygons as lists
+    of rings of arc indices (as extractArcs does), without any ring that
+    collapsed or flipped when simplified
+    """
+    arcs, topology = extractArcs(geojson)
+    simplified = [simplifyArc(arc, tolerance) for arc in arcs]
+    features = []
+    for featurePolygons in topology:
+        kept = []
+        for polygon in featurePolygons:
+            rings = []
+            for ring in polygon:
+                original = buildRing(arcs, ring)
+                points = buildRing(simplified, ring)
+                # drop rings that collapsed or flipped when simplified
+                if len(points) >= 4 and (ringArea(points) > 0) == (
+                    ringArea(original) > 0
+                ):
+                    rings.append(ring)
+                elif not rings:  # lost the exterior ring; lose its holes too
+                    break
+            if rings:
+                kept.append(rings)
+        if not kept:  # never drop a whole region; keep its largest ring as is
+            largest = max(
+                (polygon[0] for polygon in featurePolygons),
+                key=lambda ring: abs(ringArea(buildRing(arcs, ring))),
+            )
+            kept = [[list(range(len(simplified), len(simplified) + len(largest)))]]
+            simplified += [arcs[i] if i >= 0 else arcs[~i][::-1] for i in largest]
+        features.append(kept)
+    return simplified, features
+
+
+def simplify(geojson, tolerance: float):
+    """
+    simplify a geojson without opening gaps or overlaps between neighbors:
+    every shared border is simplified once and reused by both sides
+    """
+    arcs, topology = simplifyArcs(geojson, tolerance)
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": feature["properties"],
+                "geometry": {
+                    "type": "MultiPolygon",
+                    "coordinates": [
+                        [
+                            [list(point) for point in buildRing(arcs, ring)]
+                            for ring in polygon
+                        ]
+                        for polygon in featurePolygons
+                    ],
+                },
+            }
+            for feature, featurePolygons in zip(geojson["features"], topology)
+        ],
+    }
+
+
+def quantizeArc(arc, x0: float, y0: float, kx: float, ky: float):
+    """
+    snap an arc to the integer grid of a topology, dropping any repeated
+    points, and delta-encode it: every point but the first is stored as its
+    offset from the one before
+    """
+    points = []
+    for x, y in arc:
+        point = (round((x - x0) / kx), round((y - y0) / ky))
+        if not points or point != points[-1]:
+            points.append(point)
+    if len(points) == 1:  # an arc shorter than the grid; keep both ends
+        points.append(points[0])
+    deltas = [list(points[0])]
+    for (xa, ya), (xb, yb) in zip(points, points[1:]):
+        deltas.append([xb - xa, yb - ya])
+    return deltas
+
+
+def toTopology(geojson, tolerance: float, quantization: int = QUANTIZATION):
+    """
+    simplify a geojson and encode it as TopoJSON: every border is stored once
+    as an arc shared by the regions on both sides of it, its points quantized
+    to a quantization x quantization grid over the bounding box of the whole
+    geometry and delta-encoded, so they are mostly small integers
+    """
+    arcs, topology = simplifyArcs(geojson, tolerance)
+    # renumber the arcs still used by some ring, in the order first used
+    used = {}
+    for featurePolygons in topology:
+        for polygon in featurePolygons:
+            for ring in polygon:
+                for i in ring:
+                    used.setdefault(i if i >= 0 else ~i, len(used))
+
+    def renumber(i):
+        return used[i] if i >= 0 else ~used[~i]
+
+    points = [point for i in used for point in arcs[i]]
+    x0, y0 = min(x for x, _ in points), min(y for _, y in points)
+    x1, y1 = max(x for x, _ in points), max(y for _, y in points)
+    kx = (x1 - x0) / (quantization - 1) or 1
+    ky = (y1 - y0) / (quantization - 1) or 1
+    return {
+        "type": "Topology",
+        "transform": {"scale": [kx, ky], "translate": [x0, y0]},
+        "objects": {
+            "regions": {
+                "type": "GeometryCollection",
+                "geometries": [
+                    {
+                        "type": "MultiPolygon",
+                        "properties": feature["properties"],
+                        "arcs": [
+                            [[renumber(i) for i in ring] for ring in polygon]
+                            for polygon in featurePolygons
+                        ],
+                    }
+                    for feature, featurePolygons in zip(geojson["features"], topology)
+                ],
+            }
+        },
+        "arcs": [quantizeArc(arcs[i], x0, y0, kx, ky) for i in used],
+    }
+
+
+# processing functions
+
+
+def simplify_geojsons(
+    geojsons: List[Dict],
+    levels: Dict[str, float] = LEVELS,
+    import_path: str = "./data/geojsons/",
+    export_path: str = "./data/geojsons/simplified/",
+):
+    """
+    write a simplified version of each geojson at every level of detail, both
+    as a geojson and as TopoJSON
+    """
+    for geojson in geojsons:
+        with open(f"{import_path}{geojson['file']}.geojson") as f:
+            original = json.load(f)
+        for level, tolerance in levels.items():
+            path = f"{export_path}{geojson['name']}-{level}"
+            with open(f"{path}.geojson", "w") as f:
+                json.dump(simplify(original, tolerance), f, separators=(",", ":"))
+            with open(f"{path}.topojson", "w") as f:
+                json.dump(toTopology(original, tolerance), f, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    simplify_geojsons(GEOJSONS)
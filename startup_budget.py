@@ -0,0 +1,59 @@
+# Run with `python startup_budget.py [seconds]` to check that a cold start of
+# the app (importing it, then serving the page and a first choropleth) stays
+# within budget; exits with an error if it does not. Each step is timed in a
+# fresh interpreter so nothing is already imported or loaded.
+
+import json
+import subprocess
+import sys
+
+# seconds a cold start may take, unless given on the command line
+BUDGET = 1.5
+
+COLD_START = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.server.test_client()
+client.get("/")
+page = time.perf_counter()
+response = client.post(
+    "/_dash-update-component",
+    json={
+        "output": "choropleth-overall.figure",
+        "outputs": {"id": "choropleth-overall", "property": "figure"},
+        "inputs": [{"id": "year-overall", "property": "value", "value": 2022}],
+        "changedPropIds": ["year-overall.value"],
+        "state": [],
+    },
+)
+assert response.status_code == 200, response.status_code
+figure = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "first page": page - imported,
+    "first figure": figure - page,
+}))
+"""
+
+
+def coldStart():
+    """
+    time each step of a cold start, in seconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET
+    times = coldStart()
+    for step, seconds in times.items():
+        print(f"{step}: {seconds * 1000:.0f}ms")
+    total = sum(times.values())
+    print(f"total: {total * 1000:.0f}ms (budget {budget * 1000:.0f}ms)")
+    if total > budget:
+        sys.exit(f"cold start is over budget by {(total - budget) * 1000:.0f}ms")
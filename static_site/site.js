@@ -0,0 +1,130 @@
+// The static version of the app, exported by export_static.py: every figure
+// is a prerendered JSON file, so the tabs, year slider, age group dropdown
+// and play button only need to fetch and draw them. site.json lists the tabs
+// and views the way the app lays them out.
+
+const CONFIG = { displayModeBar: false, scrollZoom: false };
+
+const figures = new Map();
+const state = { tab: null, subtabs: {}, view: null, year: {}, ages: {} };
+let site = null;
+let drawing = 0;
+
+function fetchFigure(url) {
+    if (!figures.has(url)) {
+        figures.set(
+            url,
+            fetch(url).then((response) => {
+                if (!response.ok) {
+                    figures.delete(url);
+                    throw new Error(`${url}: ${response.status}`);
+                }
+                return response.json();
+            })
+        );
+    }
+    return figures.get(url);
+}
+
+function currentPage() {
+    const tab = site.tabs.find((t) => t.value === state.tab);
+    return tab.subtabs.find((s) => s.value === state.subtabs[tab.value]);
+}
+
+function agesFile(page) {
+    if (!page.ages) {
+        return "Total";
+    }
+    return page.ages.find((a) => a.value === state.ages[page.view]).file;
+}
+
+// draw a figure, unless another was asked for while it was being fetched
+async function draw(url) {
+    const request = ++drawing;
+    const figure = await fetchFigure(url);
+    if (request === drawing) {
+        // drop the frames of an animation drawn before
+        await Plotly.react("choropleth", { frames: [], ...figure }, CONFIG);
+    }
+}
+
+function drawYear() {
+    const page = currentPage();
+    const year = state.year[page.view];
+    document.getElementById("year-label").textContent = year;
+    draw(`figures/${page.view}/${year}-${encodeURIComponent(agesFile(page))}.json`);
+}
+
+function drawAnimation() {
+    const page = currentPage();
+    draw(`figures/${page.view}/all-${encodeURIComponent(agesFile(page))}.json`);
+}
+
+function renderTabs(element, tabs, selected, select) {
+    element.replaceChildren(
+        ...tabs.map((tab) => {
+            const button = document.createElement("button");
+            button.textContent = tab.label;
+            button.className = tab.value === selected ? "selected" : "";
+            button.addEventListener("click", () => select(tab.value));
+            return button;
+        })
+    );
+}
+
+function renderPage() {
+    renderTabs(document.getElementById("tabs"), site.tabs, state.tab, (value) => {
+        state.tab = value;
+        renderPage();
+    });
+    const tab = site.tabs.find((t) => t.value === state.tab);
+    renderTabs(
+        document.getElementById("subtabs"),
+        tab.subtabs,
+        state.subtabs[tab.value],
+        (value) => {
+            state.subtabs[tab.value] = value;
+            renderPage();
+        }
+    );
+
+    const page = currentPage();
+    document.getElementById("title").textContent = page.title;
+
+    const ages = document.getElementById("ages");
+    document.getElementById("ages-control").hidden = !page.ages;
+    ages.replaceChildren(
+        ...(page.ages || []).map((option) => new Option(option.label, option.value))
+    );
+    ages.value = state.ages[page.view] || "";
+
+    const year = document.getElementById("year");
+    [year.min, year.max] = page.years;
+    year.value = state.year[page.view];
+    drawYear();
+}
+
+async function main() {
+    site = await (await fetch("site.json")).json();
+    state.tab = site.defaultTab;
+    for (const tab of site.tabs) {
+        state.subtabs[tab.value] = tab.defaultSubtab;
+        for (const page of tab.subtabs) {
+            state.year[page.view] = page.years[1];
+            state.ages[page.view] = page.defaultAges;
+        }
+    }
+
+    document.getElementById("year").addEventListener("input", (event) => {
+        state.year[currentPage().view] = Number(event.target.value);
+        drawYear();
+    });
+    document.getElementById("ages").addEventListener("change", (event) => {
+        state.ages[currentPage().view] = event.target.value;
+        drawYear();
+    });
+    document.getElementById("play").addEventListener("click", drawAnimation);
+    renderPage();
+}
+
+main();